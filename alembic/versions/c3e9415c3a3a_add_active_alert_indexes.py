@@ -0,0 +1,60 @@
+"""Add active alert indexes
+
+Revision ID: c3e9415c3a3a
+Revises: e6237be279b5
+Create Date: 2026-10-18 11:04:52.730118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9415c3a3a'
+down_revision: Union[str, Sequence[str], None] = 'e6237be279b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the old select-then-insert check could let duplicates through;
+    # keep the first active alert per (user, symbol) so the unique index builds
+    op.execute(
+        """
+        DELETE FROM alerts a
+        USING alerts b
+        WHERE NOT a.is_triggered
+          AND NOT b.is_triggered
+          AND a.user_id = b.user_id
+          AND a.symbol = b.symbol
+          AND a.id > b.id
+        """
+    )
+
+    # built concurrently so a large alerts table stays writable
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_alerts_active_symbol', 'alerts', ['symbol'],
+            postgresql_where=sa.text('NOT is_triggered'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'uq_alerts_active_user_symbol', 'alerts', ['user_id', 'symbol'], unique=True,
+            postgresql_where=sa.text('NOT is_triggered'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_alerts_user_id_id_desc', 'alerts', ['user_id', sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_alerts_user_id_id_desc', table_name='alerts', postgresql_concurrently=True)
+        op.drop_index('uq_alerts_active_user_symbol', table_name='alerts', postgresql_concurrently=True)
+        op.drop_index('ix_alerts_active_symbol', table_name='alerts', postgresql_concurrently=True)
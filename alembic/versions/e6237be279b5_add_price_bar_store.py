@@ -0,0 +1,47 @@
+"""Add price bar store
+
+Revision ID: e6237be279b5
+Revises: d3e298e2666f
+Create Date: 2026-10-18 10:12:31.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6237be279b5'
+down_revision: Union[str, Sequence[str], None] = 'd3e298e2666f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('price_bars',
+    sa.Column('symbol', sa.String(length=50), nullable=False),
+    sa.Column('interval', sa.String(length=8), nullable=False),
+    sa.Column('ts', sa.BigInteger(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=True),
+    sa.Column('high', sa.Float(), nullable=True),
+    sa.Column('low', sa.Float(), nullable=True),
+    sa.Column('close', sa.Float(), nullable=True),
+    sa.Column('volume', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('symbol', 'interval', 'ts')
+    )
+    op.create_table('price_bar_sync',
+    sa.Column('symbol', sa.String(length=50), nullable=False),
+    sa.Column('interval', sa.String(length=8), nullable=False),
+    sa.Column('first_ts', sa.BigInteger(), nullable=False),
+    sa.Column('last_ts', sa.BigInteger(), nullable=False),
+    sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('symbol', 'interval')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('price_bar_sync')
+    op.drop_table('price_bars')
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -13,6 +14,96 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
 
     FINNHUB_API_KEY: str | None = None
+    FINNHUB_BASE_URL: str = "https://finnhub.io/api/v1"
+
+    # ✅ QUOTE FETCHING (sized to the Finnhub free tier: 60 calls/min)
+    # the provider quota is shared: scheduled runs get QUOTE_RATE_PER_SECOND
+    # (split across shards), each web process QUOTES_RATE_PER_SECOND for
+    # /stock/quotes. Keep QUOTE_RATE_PER_SECOND + web processes ×
+    # QUOTES_RATE_PER_SECOND within the provider limit.
+    QUOTE_CONCURRENCY: int = 10
+    QUOTE_RATE_PER_SECOND: float = 0.8
+    QUOTE_BURST: int = 24
+    QUOTE_MAX_RETRIES: int = 3
+    QUOTE_RUN_DEADLINE_SECONDS: float = 25.0
+
+    # ✅ WEBSOCKET FAN-OUT (policy: drop_oldest | coalesce | disconnect)
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_OVERFLOW_POLICY: Literal["drop_oldest", "coalesce", "disconnect"] = "drop_oldest"
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+
+    # ✅ ALERT EVENT STREAMS
+    ALERT_STREAM_MAXLEN: int = 1000
+    ALERT_STREAM_CLAIM_IDLE_MS: int = 30000
+
+    # ✅ AUTHENTICATED USER CACHE (USER_CACHE_REDIS shares it across workers)
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_REDIS: bool = False
+
+    # ✅ PASSWORD HASHING POOL (requests beyond MAX_QUEUE get a 503)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # ✅ STOCK HISTORY CACHE (HISTORY_CACHE_REDIS shares it across workers)
+    HISTORY_CACHE_MAX_SIZE: int = 2000
+    HISTORY_CACHE_REDIS: bool = False
+    HISTORY_STALE_SECONDS: float = 86400.0
+    HISTORY_MAX_POINTS: int = 1000
+
+    # ✅ QUOTE CACHE (filled by the evaluator; serves GET /stock/quotes)
+    QUOTE_CACHE_TTL_SECONDS: float = 60.0
+    # last known price is kept this long in Redis, served as stale if upstream fails
+    QUOTE_CACHE_RETAIN_SECONDS: float = 86400.0
+    QUOTE_CACHE_MAX_SIZE: int = 5000
+    QUOTE_CACHE_REDIS: bool = True
+    QUOTES_MAX_SYMBOLS: int = 100
+    QUOTES_DEADLINE_SECONDS: float = 5.0
+    # upstream quota for /stock/quotes, per web process (see QUOTE FETCHING)
+    QUOTES_RATE_PER_SECOND: float = 0.2
+    QUOTES_BURST: int = 5
+
+    # in-memory alert index is reloaded from the table at least this often
+    ALERT_INDEX_MAX_AGE_SECONDS: float = 300.0
+    # rows per server-side cursor fetch, and alerts per trigger transaction
+    ALERT_PROCESS_CHUNK_SIZE: int = 1000
+
+    # ✅ ALERT LISTING (GET /alerts/?limit=&cursor= pages by id; next page via X-Next-Cursor)
+    ALERTS_PAGE_SIZE: int = 100
+    ALERTS_MAX_PAGE_SIZE: int = 500
+
+    # ✅ SHARDED EVALUATION (/tasks/schedule fans out one message per shard)
+    ALERT_SHARDS: int = 1
+    # per-shard run lock; renewed while the run is alive
+    RUN_LOCK_SECONDS: float = 60.0
+
+    # ✅ ADAPTIVE CHECK SCHEDULING (per-symbol interval while its market is open)
+    SCHEDULE_ADAPTIVE: bool = True
+    SCHEDULE_MIN_INTERVAL_SECONDS: float = 60.0
+    SCHEDULE_MAX_INTERVAL_SECONDS: float = 1800.0
+    SCHEDULE_SAFETY_FACTOR: float = 0.1
+    SCHEDULE_VOLATILITY_HALFLIFE_SECONDS: float = 3600.0
+
+    # ✅ ALERT WORKER (python -m app.worker)
+    WORKER_TICK_SECONDS: float = 60.0
+    WORKER_SHARD: int = 0
+    WORKER_TOTAL_SHARDS: int = 1
+    WORKER_PORT: int = 8081
+    WORKER_SHUTDOWN_SECONDS: float = 25.0
+
+    # ✅ STREAMING TRADE FEED (runs in the worker; REPLAY_FILE replays JSONL instead)
+    TRADE_FEED_ENABLED: bool = False
+    TRADE_FEED_URL: str = "wss://ws.finnhub.io"
+    TRADE_FEED_MAX_SYMBOLS: int = 50
+    TRADE_FEED_FLUSH_SECONDS: float = 0.25
+    TRADE_FEED_RESYNC_SECONDS: float = 30.0
+    TRADE_FEED_REPLAY_FILE: str | None = None
+    TRADE_FEED_REPLAY_SPEED: float = 1.0
+
+    # ✅ SHARED HTTP CLIENT POOL
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
 
     # ✅ EMAIL SETTINGS
     EMAIL_PROVIDER: str = "sendgrid"
@@ -26,6 +117,15 @@ class Settings(BaseSettings):
     # SendGrid
     SENDGRID_API_KEY: str | None = None
     EMAIL_FROM: str | None = None
+    SENDGRID_API_URL: str = "https://api.sendgrid.com"
+
+    # ✅ EMAIL DISPATCH (batches of up to 1000 recipients per SendGrid call)
+    EMAIL_QUEUE_SIZE: int = 10000
+    EMAIL_BATCH_SIZE: int = 1000
+    EMAIL_BATCH_WAIT_SECONDS: float = 1.0
+    EMAIL_SEND_CONCURRENCY: int = 2
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_DRAIN_SECONDS: float = 10.0
 
     BACKEND_URL: str
 
@@ -0,0 +1,18 @@
+import json
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def json_response(obj, status_code: int = 200, headers: dict | None = None) -> Response:
+    """Pre-serialized JSON response that skips FastAPI's response validation/encoding."""
+    return Response(content=dumps(obj), status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,57 @@
+import httpx
+from fastapi import Request
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientPool:
+    """
+    App-wide pool of keep-alive httpx clients, one per upstream host
+    (Finnhub, Yahoo, QStash, ...), so every host gets its own connection
+    limits and connections are reused across requests.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int | None = None,
+        max_keepalive_per_host: int | None = None,
+        keepalive_expiry: float | None = None,
+        http2: bool | None = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host or settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=max_keepalive_per_host or settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=keepalive_expiry or settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for the host of `url`."""
+        parsed = httpx.URL(url)
+        origin = f"{parsed.scheme}://{parsed.netloc.decode()}"
+
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+            )
+            self._clients[origin] = client
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+def get_http_pool(request: Request) -> HTTPClientPool:
+    """FastAPI dependency returning the pool created in the app lifespan."""
+    return request.app.state.http_pool
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.models import User
 from app.db.session import get_db
+from app.core.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -19,10 +20,21 @@ async def get_current_user(
     except:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    
+    cached = await user_cache.get(user_id)
+    if cached:
+        if not cached.is_active:
+            raise HTTPException(status_code=403, detail="Inactive user")
+        return cached
+
+    result = await db.execute(
+        select(User.id, User.email, User.is_active).where(User.id == user_id)
+    )
+    user = result.one_or_none()
+
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user
+    cached = await user_cache.set(user)
+    if not cached.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return cached
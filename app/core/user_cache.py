@@ -0,0 +1,221 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+import redis.asyncio as redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from colorama import Fore
+from app.core.config import settings
+from app.db.models import User
+
+# user ids whose cached copy every process should drop
+USER_CHANNEL = "users:invalidate"
+
+
+class CachedUser(NamedTuple):
+    """Compact stand-in for the User row returned by get_current_user."""
+    id: int
+    email: str
+    is_active: bool
+
+
+class UserCache:
+    """
+    TTL + LRU cache of authenticated users keyed by id, with an optional
+    Redis tier shared across workers (USER_CACHE_REDIS).
+
+    An invalidation is also published on USER_CHANNEL; processes that
+    start() the cache drop their copy too, so a deactivated user is dropped
+    everywhere rather than only once each local TTL runs out.
+    """
+
+    def __init__(self, max_size: int, ttl: float, use_redis: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._entries: OrderedDict[int, tuple[float, CachedUser]] = OrderedDict()
+        self._redis = None
+        self._listener: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # metrics
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}:profile"
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _get_local(self, user_id: int) -> CachedUser | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, user = entry
+        if expires < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def _set_local(self, user: CachedUser):
+        self._entries[user.id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, user_id: int) -> CachedUser | None:
+        user = self._get_local(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        if self.use_redis:
+            try:
+                raw = await self._client().get(self._key(user_id))
+                if raw:
+                    user = CachedUser(**json.loads(raw))
+                    self._set_local(user)
+                    self.redis_hits += 1
+                    return user
+            except Exception as e:
+                print(Fore.RED + f"User cache Redis read failed: {e}")
+
+        self.misses += 1
+        return None
+
+    async def set(self, user) -> CachedUser:
+        cached = CachedUser(user.id, user.email, bool(user.is_active))
+        self._set_local(cached)
+        if self.use_redis:
+            try:
+                await self._client().set(
+                    self._key(cached.id), json.dumps(cached._asdict()), px=int(self.ttl * 1000)
+                )
+            except Exception as e:
+                print(Fore.RED + f"User cache Redis write failed: {e}")
+        return cached
+
+    def invalidate(self, user_id: int):
+        """Drop the user locally and (in the background) from the shared tier and other processes."""
+        self._entries.pop(user_id, None)
+        self.invalidations += 1
+        try:
+            task = asyncio.get_running_loop().create_task(self._invalidate_elsewhere(user_id))
+        except RuntimeError:
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def drop_local(self, user_id: int):
+        """Invalidation received from another process."""
+        if self._entries.pop(user_id, None) is not None:
+            self.remote_invalidations += 1
+
+    async def _invalidate_elsewhere(self, user_id: int):
+        if self.use_redis:
+            try:
+                await self._client().delete(self._key(user_id))
+            except Exception as e:
+                print(Fore.RED + f"User cache Redis delete failed: {e}")
+        try:
+            await self._client().publish(USER_CHANNEL, str(user_id))
+        except Exception as e:
+            print(Fore.RED + f"User cache invalidation publish failed: {e}")
+
+    def start(self):
+        """Drop users other processes invalidate from the local tier."""
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        backoff = 1.0
+        first = True
+        while True:
+            pubsub = self._client().pubsub()
+            try:
+                await pubsub.subscribe(USER_CHANNEL)
+                print(Fore.GREEN + f"User cache subscribed to {USER_CHANNEL}")
+                backoff = 1.0
+                if not first:
+                    # invalidations may have been missed while disconnected
+                    self._entries.clear()
+                first = False
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.drop_local(int(message["data"]))
+                    except ValueError as e:
+                        print(Fore.RED + f"Bad user invalidation message: {e}")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(Fore.RED + f"User cache subscription lost: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def aclose(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    use_redis=settings.USER_CACHE_REDIS,
+)
+
+
+# a user changed or deleted through the ORM drops its cached copy once the
+# change is committed, so a concurrent request can't re-cache the old row
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = [obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault("changed_users", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_users", None)
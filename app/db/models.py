@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Float, Enum, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -37,6 +37,21 @@ class Alert(Base):
         passive_deletes=True
     )
 
+    __table_args__ = (
+        # active-alert scan (index rebuild, per-symbol lookups)
+        Index("ix_alerts_active_symbol", "symbol", postgresql_where=text("NOT is_triggered")),
+        # at most one active alert per user and symbol
+        Index(
+            "uq_alerts_active_user_symbol",
+            "user_id",
+            "symbol",
+            unique=True,
+            postgresql_where=text("NOT is_triggered"),
+        ),
+        # a user's alerts, newest first
+        Index("ix_alerts_user_id_id_desc", user_id, id.desc()),
+    )
+
 class AlertHistory(Base):
     __tablename__ = "alert_history"
     id = Column(Integer, primary_key=True, index=True)
@@ -47,4 +62,25 @@ class AlertHistory(Base):
     triggered_price = Column(Float, nullable=False)
     triggered_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    alert = relationship("Alert", back_populates="histories")
\ No newline at end of file
+    alert = relationship("Alert", back_populates="histories")
+
+class PriceBar(Base):
+    """One OHLC candle; ts is the bar's open time in epoch seconds."""
+    __tablename__ = "price_bars"
+    symbol = Column(String(50), primary_key=True)
+    interval = Column(String(8), primary_key=True)
+    ts = Column(BigInteger, primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+
+class PriceBarSync(Base):
+    """Range of bars already stored per (symbol, interval) and when it was last extended."""
+    __tablename__ = "price_bar_sync"
+    symbol = Column(String(50), primary_key=True)
+    interval = Column(String(8), primary_key=True)
+    first_ts = Column(BigInteger, nullable=False)
+    last_ts = Column(BigInteger, nullable=False)
+    synced_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,4 +1,5 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import websocket as websocket_router
@@ -7,11 +8,67 @@ from app.routers import alerts as alerts_router
 from app.routers import stock as stock_router
 from app.routers import qstash_alert as qstash_router
 from app.core.config import settings
+from app.core.http_client import HTTPClientPool
+from app.core.user_cache import user_cache
+from app.db.session import AsyncSessionLocal
+from app.services.alert_index import alert_index
+from app.services.ws_hub import hub
+from app.services.history_cache import history_cache
+from app.services.quote_cache import quote_cache
+from app.services.email_dispatch import email_dispatcher
+from app.services.index_sync import IndexSync, close_publisher
+from app.services.auth_service import hash_pool_metrics, shutdown_hash_pool
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
-app = FastAPI(title="Stock Alert System")
+# alerts created/deleted in other web processes reach this process's index
+index_sync = IndexSync()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # shared keep-alive HTTP clients for all upstream calls
+    app.state.http_pool = HTTPClientPool()
+    print(Fore.GREEN + f"HTTP client pool ready (http2={app.state.http_pool.http2})")
+
+    # users changed in other web processes drop out of this one's cache
+    user_cache.start()
+
+    # subscribe before the warm-up; changes arriving while it streams are
+    # journaled by the index and replayed onto the rebuilt one
+    await index_sync.start()
+
+    # warm the alert index; /tasks/process rebuilds it lazily if this fails
+    try:
+        async with AsyncSessionLocal() as db:
+            await alert_index.rebuild(db, settings.ALERT_PROCESS_CHUNK_SIZE)
+        print(Fore.GREEN + f"Alert index loaded ({len(alert_index)} active alerts)")
+    except Exception as e:
+        print(Fore.RED + f"Alert index warm-up failed: {e}")
+
+    # one Redis subscription per process for all WebSockets
+    await hub.start()
+
+    # alert emails go out in batches over a pooled SendGrid connection
+    email_dispatcher.start(app.state.http_pool.client_for(settings.SENDGRID_API_URL))
+
+    try:
+        yield
+    finally:
+        await hub.stop()
+        await index_sync.stop()
+        await email_dispatcher.stop(settings.EMAIL_DRAIN_SECONDS)
+        await user_cache.aclose()
+        await history_cache.aclose()
+        await quote_cache.aclose()
+        await close_publisher()
+        shutdown_hash_pool()
+        await app.state.http_pool.aclose()
+        print(Fore.YELLOW + "HTTP client pool closed")
+
+
+app = FastAPI(title="Stock Alert System", lifespan=lifespan)
 
 origins = [
     "https://stock-alert-ui-sable.vercel.app",
@@ -26,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor"],  # alert list pagination
 )
 
 app.include_router(auth_router.router, prefix="/auth", tags=["auth"])
@@ -38,3 +96,16 @@ app.include_router(qstash_router.router, prefix="/tasks", tags=["qstash_alert"])
 async def root():
     print(Fore.GREEN + "API 'root' endpoint accessed")
     return {"status": "ok", "app": "stock-alert-system", "message": "Welcome to the Stock Alert System!"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "user_cache": user_cache.metrics(),
+        "password_hashing": hash_pool_metrics(),
+        "history_cache": history_cache.metrics(),
+        "quote_cache": quote_cache.metrics(),
+        "websocket": hub.metrics(),
+        "email": email_dispatcher.metrics(),
+        "index_sync": index_sync.metrics(),
+    }
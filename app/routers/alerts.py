@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from colorama import Fore, Style, init
+from app.core.config import settings
+from app.core.fast_json import json_response
 from app.core.security import get_current_user
 from app.db.session import get_db
 from app.db.models import Alert, DirectionEnum
 from app.db.schemas import AlertCreate, AlertOut
+from app.services.alert_index import alert_index
+from app.services.index_sync import publish_index_change
 from typing import List
 
 router = APIRouter()
@@ -25,37 +31,130 @@ async def create_alert(
         direction=alert_data.direction,
         is_triggered=False,
     )
-    # prevent duplicate alerts
-    existing = await db.execute(
-        select(Alert).where(
-            Alert.user_id == user.id,
-            Alert.symbol == alert.symbol.upper(),
-            Alert.is_triggered == False,
-        )
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(
-            status_code=400, detail="An active alert for this symbol already exists."
-        )
     print(Fore.YELLOW + f"Creating alert for user {user.email}: {alert.symbol} {alert.direction} {alert.target_price} {alert.created_at}" + Style.RESET_ALL)
 
     db.add(alert)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # one active alert per user and symbol, enforced by the partial unique index
+        if "uq_alerts_active_user_symbol" not in str(e.orig):
+            raise
+        raise HTTPException(
+            status_code=400, detail="An active alert for this symbol already exists."
+        )
     await db.refresh(alert)
+    alert_index.add(alert)
+    await publish_index_change("add", alert)
 
     return alert
 
 
 # ------------------- LIST ALERTS -------------------
+def iso(value: datetime | None) -> str | None:
+    # same rendering as AlertOut (pydantic writes UTC as "Z")
+    if value is None:
+        return None
+    return value.isoformat().replace("+00:00", "Z")
+
+
+# only the AlertOut columns, read as plain rows (no ORM identity map or hydration)
+ALERT_COLUMNS = (
+    Alert.id,
+    Alert.symbol,
+    Alert.target_price,
+    Alert.direction,
+    Alert.is_triggered,
+    Alert.created_at,
+)
+
+
+async def alert_page(
+    db: AsyncSession,
+    user_id: int,
+    limit: int | None,
+    cursor: int | None = None,
+    symbol: str | None = None,
+    is_triggered: bool | None = None,
+    created_after: datetime | None = None,
+) -> tuple[list[dict], int | None]:
+    """
+    One page of a user's alerts, newest first, and the cursor for the next
+    page (None on the last one). Keyset on id, so every page is a range scan
+    of ix_alerts_user_id_id_desc no matter how deep it is.
+    """
+    query = select(*ALERT_COLUMNS).where(Alert.user_id == user_id)
+    if cursor is not None:
+        query = query.where(Alert.id < cursor)
+    if symbol:
+        query = query.where(Alert.symbol == symbol.upper())
+    if is_triggered is not None:
+        query = query.where(Alert.is_triggered == is_triggered)
+    if created_after is not None:
+        query = query.where(Alert.created_at > created_after)
+    query = query.order_by(Alert.id.desc())
+    if limit is not None:
+        # one extra row tells whether another page follows
+        query = query.limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    alerts = [
+        {
+            "id": row.id,
+            "symbol": row.symbol,
+            "target_price": row.target_price,
+            "direction": row.direction.value,
+            "is_triggered": row.is_triggered,
+            "created_at": iso(row.created_at),
+        }
+        for row in rows
+    ]
+    return alerts, next_cursor
+
+
 @router.get("/", response_model=List[AlertOut])
 async def get_alerts(
-    db: AsyncSession = Depends(get_db), user=Depends(get_current_user)
+    cursor: int | None = None,
+    limit: int | None = Query(None, ge=1),
+    symbol: str | None = None,
+    is_triggered: bool | None = None,
+    created_after: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(Alert).where(Alert.user_id == user.id).order_by(Alert.id.desc())
+    """
+    The user's alerts, newest first.
+
+    Without `limit` or `cursor` every alert is returned, as before. With
+    either, the list is paginated: at most `limit` (default
+    ALERTS_PAGE_SIZE, capped by ALERTS_MAX_PAGE_SIZE) per page, and when
+    more remain the response carries an X-Next-Cursor header; pass it back
+    as ?cursor= for the next page.
+
+    Filters: symbol, is_triggered, created_after (ISO 8601).
+    """
+    if limit is None and cursor is None:
+        page_size = None
+    else:
+        page_size = min(limit or settings.ALERTS_PAGE_SIZE, settings.ALERTS_MAX_PAGE_SIZE)
+
+    alerts, next_cursor = await alert_page(
+        db,
+        user.id,
+        page_size,
+        cursor=cursor,
+        symbol=symbol,
+        is_triggered=is_triggered,
+        created_after=created_after,
     )
-    alerts = result.scalars().all()
-    return alerts
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return json_response(alerts, headers=headers)
 
 
 # ------------------- DELETE ALERT -------------------
@@ -73,5 +172,7 @@ async def delete_alert(
 
     await db.delete(alert)
     await db.commit()
+    alert_index.remove(alert_id)
+    await publish_index_change("remove", alert_id=alert_id)
 
     return {Fore.GREEN + "status": "deleted", "alert_id": alert_id}
@@ -4,7 +4,7 @@ from sqlalchemy import select
 from app.db.session import get_db
 from app.db.models import User
 from app.db.schemas import UserCreate, UserLogin, UserOut
-from app.services.auth_service import hash_password, verify_password, create_access_token
+from app.services.auth_service import hash_password_async, verify_password_async, create_access_token
 
 router = APIRouter()
 
@@ -19,7 +19,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
     new_user = User(
         email=user.email,
-        password_hash=hash_password(user.password)
+        password_hash=await hash_password_async(user.password)
     )
 
     db.add(new_user)
@@ -37,7 +37,7 @@ async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
     if not existing:
         raise HTTPException(status_code=400, detail="Invalid login credentials")
 
-    if not verify_password(user.password, existing.password_hash):
+    if not await verify_password_async(user.password, existing.password_hash):
         raise HTTPException(status_code=400, detail="Invalid login credentials")
 
     token = create_access_token(existing.id)
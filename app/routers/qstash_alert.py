@@ -1,30 +1,37 @@
 import asyncio
-import json
-import httpx
 import redis.asyncio as redis
 from fastapi import APIRouter, Request, Header, Depends, HTTPException
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from colorama import Fore, init
 
 from app.core.config import settings
-from app.db.models import Alert, AlertHistory, DirectionEnum, User
+from app.core.http_client import HTTPClientPool, get_http_pool
 from app.db.session import get_db
-from app.services.email_service import send_alert_email
+from app.services.alert_evaluator import run_shard
+from app.services.sharding import parse_shard, parse_total_shards
 
 init(autoreset=True)
 router = APIRouter()
 
 
 @router.post("/schedule")
-async def schedule_alert(payload: dict):
+async def schedule_alert(payload: dict, http: HTTPClientPool = Depends(get_http_pool)):
     """
     Publish a QStash message which will POST to BACKEND_URL/tasks/process
-    (used for manual testing or from backend)
+    (used for manual testing or from backend).
+
+    With total_shards > 1 (payload or ALERT_SHARDS) one message is published
+    per shard, each carrying its `shard` and `total_shards`.
     """
     if not getattr(settings, "QSTASH_URL", None) or not getattr(settings, "QSTASH_TOKEN", None):
         raise HTTPException(status_code=500, detail="QStash not configured")
 
+    payload = payload or {}
+    try:
+        total_shards = parse_total_shards(payload, settings.ALERT_SHARDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     backend = settings.BACKEND_URL.rstrip("/")
     publish_url = f"{settings.QSTASH_URL.rstrip('/')}/v2/publish/{backend}/tasks/process"
 
@@ -33,15 +40,21 @@ async def schedule_alert(payload: dict):
         "Content-Type": "application/json",
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(publish_url, json=payload or {}, headers=headers, timeout=30.0)
+    async def publish(body: dict):
+        resp = await http.client_for(publish_url).post(publish_url, json=body, headers=headers, timeout=30.0)
+        try:
+            return resp.json()
+        except Exception:
+            return {"status_code": resp.status_code, "text": resp.text}
 
-    try:
-        body = resp.json()
-    except Exception:
-        body = {"status_code": resp.status_code, "text": resp.text}
+    if total_shards == 1:
+        return {"status": "scheduled", "qstash_response": await publish(payload)}
 
-    return {"status": "scheduled", "qstash_response": body}
+    responses = await asyncio.gather(*(
+        publish({**payload, "shard": shard, "total_shards": total_shards})
+        for shard in range(total_shards)
+    ))
+    return {"status": "scheduled", "shards": total_shards, "qstash_response": responses}
 
 
 # Primary route QStash will call: /tasks/process
@@ -49,6 +62,7 @@ async def schedule_alert(payload: dict):
 async def process_task(
     request: Request,
     db: AsyncSession = Depends(get_db),
+    http: HTTPClientPool = Depends(get_http_pool),
 ):
     print(Fore.GREEN + "PROCESS TASK STARTED")
 
@@ -58,99 +72,33 @@ async def process_task(
     except Exception:
         _incoming = {}
 
-    result = await db.execute(select(Alert).where(Alert.is_triggered == False))
-    alerts = result.scalars().all()
-
-    if not alerts:
-        print(Fore.BLUE + "No active alerts.")
-        return {"message": "No active alerts"}
+    if not isinstance(_incoming, dict):
+        _incoming = {}
 
-    print(Fore.YELLOW + f"Found {len(alerts)} active alerts")
+    try:
+        shard, total_shards = parse_shard(_incoming)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     r = redis.from_url(settings.REDIS_URL)
-
-    for alert in alerts:
-        symbol = alert.symbol.upper()
-
-        url = (
-            f"https://finnhub.io/api/v1/quote?"
-            f"symbol={symbol}&token={settings.FINNHUB_API_KEY}"
-        )
-
-        try:
-            async with httpx.AsyncClient() as client:
-                res = await client.get(url, timeout=10.0)
-            data = res.json()
-            current_price = data.get("c")
-            if current_price is None:
-                print(Fore.RED + f"No price returned for {symbol}")
-                continue
-        except Exception as e:
-            print(Fore.RED + f"Error fetching {symbol}: {e}")
-            continue
-
-        triggered = (
-            (alert.direction == DirectionEnum.ABOVE and current_price > alert.target_price)
-            or
-            (alert.direction == DirectionEnum.BELOW and current_price < alert.target_price)
-        )
-
-        if not triggered:
-            continue
-
-        alert.is_triggered = True
-        history = AlertHistory(alert_id=alert.id, triggered_price=current_price)
-        db.add(history)
-        await db.commit()
-        await db.refresh(alert)
-
-        payload = {
-            "type": "alert_triggered",
-            "symbol": alert.symbol,
-            "current_price": current_price,
-            "target_price": alert.target_price,
-            "direction": alert.direction.value,
-        }
-
-        channel = f"user:{alert.user_id}:alerts"
-
-        try:
-            await r.rpush(channel, json.dumps(payload))
-            print(Fore.GREEN + f"Redis RPUSH → {channel}")
-        except Exception as e:
-            print(Fore.RED + f"Redis RPUSH failed: {e}")
-
-        # email sending (async)
-        try:
-            q = await db.execute(select(User).where(User.id == alert.user_id))
-            user = q.scalar_one_or_none()
-            if user and user.email:
-                asyncio.create_task(
-                    asyncio.to_thread(
-                        send_alert_email,
-                        user.email,
-                        alert.symbol,
-                        current_price,
-                        alert.target_price,
-                    )
-                )
-                print(Fore.MAGENTA + f"EMAIL QUEUED → {user.email}")
-        except Exception as e:
-            print(Fore.RED + f"Email lookup/send failed: {e}")
-
     try:
-        await r.aclose()
-    except Exception:
-        pass
-
-    return {"status": "processed", "processed": len(alerts)}
+        return await run_shard(db, http, r, shard, total_shards, full=bool(_incoming.get("full")))
+    finally:
+        try:
+            await r.aclose()
+        except Exception:
+            pass
 
 
 # Compatibility alias: allow QStash or external tools to call /alerts/check
 @router.post("/check")
-async def process_task_alias(request: Request, db: AsyncSession = Depends(get_db)):
+async def process_task_alias(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    http: HTTPClientPool = Depends(get_http_pool),
+):
     """
     Backwards-compatible alias; calls the same processing logic at /tasks/process
     QStash publish can point to either /tasks/process or /tasks/check
     """
-    return await process_task(request, db)
+    return await process_task(request, db, http)
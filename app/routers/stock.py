@@ -1,67 +1,156 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.core.security import get_current_user
-import httpx
+from app.core.http_client import HTTPClientPool, get_http_pool
+from app.core.fast_json import json_response
+from app.services.history_cache import history_cache
+from app.services.bar_store import INTERVALS, bar_store
+from app.services.downsample import lttb, ohlc_buckets
+from app.services.quote_cache import quote_cache
+from app.services.quote_service import QuoteFetcher, TokenBucket
+from app.core.config import settings
 import time
 
 router = APIRouter()
 
+# period -> days of history ("1m" is one month)
+PERIODS = {
+    "1d": 1,
+    "7d": 7,
+    "1m": 30,
+    "3m": 91,
+    "6m": 182,
+    "1y": 365,
+    "2y": 730,
+    "5y": 1826,
+}
+
+INTRADAY_INTERVALS = {"1m", "5m", "15m", "30m", "1h"}
+
+# period -> seconds a cached daily-bar response stays fresh (daily bars barely move)
+CACHE_TTLS = {
+    "1d": 60,
+    "7d": 300,
+    "1m": 900,
+    "3m": 1800,
+    "6m": 3600,
+    "1y": 3600,
+    "2y": 3600,
+    "5y": 3600,
+}
+INTRADAY_CACHE_TTL = 60
+
+# upstream quote calls from /quotes share this process's slice of the provider quota
+quote_bucket = TokenBucket(settings.QUOTES_RATE_PER_SECOND, settings.QUOTES_BURST)
+
+
+def to_rows(columns: dict) -> list[dict]:
+    keys = [k for k in ("time", "open", "high", "low", "close") if k in columns]
+    return [dict(zip(keys, values)) for values in zip(*(columns[k] for k in keys))]
+
+
 @router.get("/history")
 async def get_stock_history(
     symbol: str,
     period: str = "7d",   # ✅ renamed from range → period
+    format: str = "rows",
+    interval: str = "1d",
+    max_points: int | None = None,
+    style: str = "candles",
     user=Depends(get_current_user),
+    http: HTTPClientPool = Depends(get_http_pool),
 ):
     """
     Yahoo Finance Stock History (FREE & UNLIMITED)
-    Periods supported: 1d, 7d, 1m
-    """
+    Periods supported: 1d, 7d, 1m (month), 3m, 6m, 1y, 2y, 5y
+    Intervals supported: 1m (minute), 5m, 15m, 30m, 1h, 1d, 1wk, 1mo
+    Served from the local bar store, which only fetches bars it does not
+    have yet; responses are cached per (symbol, period, interval) and
+    concurrent misses share one store lookup.
 
-    now = int(time.time())
+    format=rows (default): [{time, open, high, low, close}, ...]
+    format=columnar: {time: [...], open: [...], high: [...], low: [...], close: [...], volume: [...]}
 
-    periods = {
-        "1d": 1,
-        "7d": 7,
-        "1m": 30,
-    }
+    At most max_points points are returned (capped by HISTORY_MAX_POINTS):
+    style=candles (default) aggregates OHLC buckets, style=line returns
+    only time/close picked with LTTB.
+    """
 
-    if period not in periods:
+    if period not in PERIODS:
         raise HTTPException(status_code=400, detail="Invalid period")
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail="Invalid interval")
+    if INTERVALS[interval] is not None and PERIODS[period] > INTERVALS[interval]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Interval {interval} is only available for the last {INTERVALS[interval]} days",
+        )
+    if format not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="Invalid format")
+    if style not in ("candles", "line"):
+        raise HTTPException(status_code=400, detail="Invalid style")
+    if max_points is not None and max_points < 2:
+        raise HTTPException(status_code=400, detail="max_points must be at least 2")
 
-    days = periods[period]
-    start = now - days * 24 * 60 * 60
+    symbol = symbol.upper()
+    ttl = INTRADAY_CACHE_TTL if interval in INTRADAY_INTERVALS else CACHE_TTLS[period]
+    start = int(time.time()) - PERIODS[period] * 24 * 60 * 60
 
-    url = (
-        f"https://query1.finance.yahoo.com/v8/finance/chart/"
-        f"{symbol}?period1={start}&period2={now}&interval=1d&events=history"
+    columns = await history_cache.get_or_fetch(
+        f"bars:{symbol}:{period}:{interval}",
+        ttl,
+        lambda: bar_store.get_columns(http, symbol, interval, start, ttl),
     )
 
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    limit = min(max_points or settings.HISTORY_MAX_POINTS, settings.HISTORY_MAX_POINTS)
+    if style == "line":
+        columns = lttb(columns, limit)
+    else:
+        columns = ohlc_buckets(columns, limit)
 
-    async with httpx.AsyncClient(headers=headers) as client:
-        resp = await client.get(url)
+    if format == "columnar":
+        return json_response(columns)
+    return json_response(to_rows(columns))
 
-    if resp.status_code != 200 or not resp.text.strip():
-        raise HTTPException(status_code=502, detail="Yahoo Finance API blocked the request")
 
-    data = resp.json()
+@router.get("/quotes")
+async def get_quotes(
+    symbols: str,
+    user=Depends(get_current_user),
+    http: HTTPClientPool = Depends(get_http_pool),
+):
+    """
+    Latest price for many symbols: ?symbols=AAPL,MSFT,...
+
+    Read from the shared quote cache (the evaluator keeps it warm) in one
+    Redis round trip; only stale symbols are quoted upstream, once each even
+    across concurrent requests. If upstream fails the last known price is
+    returned with stale=true; symbols with no price at all are listed in
+    `missing`.
 
-    try:
-        result = data["chart"]["result"][0]
-        timestamps = result["timestamp"]
-        quotes = result["indicators"]["quote"][0]
-    except Exception:
-        raise HTTPException(status_code=404, detail="No chart data available")
+    {"quotes": {"AAPL": {"price": 187.2, "time": 1718000000000, "stale": false}}, "missing": []}
+    """
+    requested = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > settings.QUOTES_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUOTES_MAX_SYMBOLS} symbols per request",
+        )
 
-    formatted = []
-    for i in range(len(timestamps)):   # ✅ works now
-        formatted.append({
-            "time": timestamps[i] * 1000,
-            "open": quotes["open"][i],
-            "high": quotes["high"][i],
-            "low": quotes["low"][i],
-            "close": quotes["close"][i],
-        })
+    async def fetch(stale: list[str]) -> dict[str, float]:
+        fetcher = QuoteFetcher(
+            client=http.client_for(settings.FINNHUB_BASE_URL),
+            deadline=settings.QUOTES_DEADLINE_SECONDS,
+            bucket=quote_bucket,
+        )
+        return await fetcher.fetch_many(stale)
 
-    return formatted
+    found = await quote_cache.get_or_fetch(requested, fetch)
+    return json_response({
+        "quotes": {
+            symbol: {"price": quote.price, "time": int(quote.ts * 1000), "stale": stale}
+            for symbol, (quote, stale) in found.items()
+        },
+        "missing": [s for s in requested if s not in found],
+    })
@@ -0,0 +1,218 @@
+import time
+from itertools import islice
+from colorama import Fore
+from app.core.config import settings
+from app.core.http_client import HTTPClientPool
+from app.db.session import AsyncSessionLocal
+from app.services.alert_index import alert_index
+from app.services.check_scheduler import check_scheduler
+from app.services.alert_events import publish_alert_events
+from app.services.email_dispatch import AlertEmail, email_dispatcher
+from app.services.quote_cache import quote_cache
+from app.services.quote_service import QuoteFetcher, TokenBucket
+from app.services.run_lock import RunLock, RunWatermark
+from app.services.sharding import run_name, shard_of
+from app.services.trigger_service import persist_triggers
+
+
+class RunLockLost(Exception):
+    """The run's lock lapsed mid-evaluation; `triggered` alerts were already written."""
+
+    def __init__(self, fence: int | None, triggered: int):
+        super().__init__(f"run lock lost (fence {fence})")
+        self.triggered = triggered
+
+
+# one quote quota per process, shared by every run (QStash or worker tick);
+# keyed by shard count, since each shard gets its share of the provider limit
+_run_buckets: dict[int, TokenBucket] = {}
+
+
+def run_bucket(total_shards: int) -> TokenBucket:
+    bucket = _run_buckets.get(total_shards)
+    if bucket is None:
+        bucket = _run_buckets[total_shards] = TokenBucket(
+            settings.QUOTE_RATE_PER_SECOND / total_shards,
+            max(1, settings.QUOTE_BURST // total_shards),
+        )
+    return bucket
+
+
+def chunks(iterable, size: int):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+async def evaluate_prices(db, r, prices: dict[str, float], lock: RunLock | None = None) -> int:
+    """
+    Trigger every indexed alert crossed by `prices` and return how many fired.
+
+    Evaluation and writes happen in ALERT_PROCESS_CHUNK_SIZE chunks: each
+    chunk is one transaction (already-triggered alerts are skipped), then
+    published and emailed. With a `lock`, a run that lost it stops before
+    writing the next chunk.
+    """
+    crossed = (
+        (alert, current_price)
+        for symbol, current_price in prices.items()
+        for alert in alert_index.crossed(symbol, current_price)
+    )
+    triggered_count = 0
+    for chunk in chunks(crossed, settings.ALERT_PROCESS_CHUNK_SIZE):
+        if lock is not None and not await lock.still_held():
+            raise RunLockLost(lock.fence, triggered_count)
+
+        triggered = await persist_triggers(db, chunk)
+        for alert, _ in chunk:
+            alert_index.remove(alert.id)
+        triggered_count += len(triggered)
+
+        if triggered:
+            print(Fore.GREEN + f"Triggered {len(triggered)} alerts")
+
+        try:
+            await publish_alert_events(r, triggered)
+        except Exception as e:
+            print(Fore.RED + f"Redis publish failed: {e}")
+
+        # batched, retried sends on the shared dispatcher
+        for t in triggered:
+            if not t.email:
+                continue
+            if email_dispatcher.submit(AlertEmail(t.email, t.alert.symbol, t.price, t.alert.target_price)):
+                print(Fore.MAGENTA + f"EMAIL QUEUED → {t.email}")
+
+    return triggered_count
+
+
+async def ensure_index_fresh() -> bool:
+    """Rebuild the alert index if it is older than ALERT_INDEX_MAX_AGE_SECONDS; True if rebuilt."""
+    if not alert_index.is_stale(settings.ALERT_INDEX_MAX_AGE_SECONDS):
+        return False
+    async with AsyncSessionLocal() as db:
+        await alert_index.rebuild(db, settings.ALERT_PROCESS_CHUNK_SIZE)
+    return True
+
+
+async def run_shard(
+    db,
+    http: HTTPClientPool,
+    r,
+    shard: int = 0,
+    total_shards: int = 1,
+    full: bool = False,
+) -> dict:
+    """
+    One scheduled evaluation run over a shard's symbols: quote them, skip
+    the ones unchanged since the last run, trigger what crossed. Used by
+    /tasks/process and the standalone worker.
+    """
+    # one run per shard at a time (QStash redelivers while a run is still
+    # going); an overlapping delivery is acknowledged and skipped
+    lock = RunLock(r, run_name(shard, total_shards), settings.RUN_LOCK_SECONDS)
+    try:
+        if not await lock.acquire():
+            print(Fore.BLUE + f"Run for shard {shard}/{total_shards} already in progress, skipping")
+            return {"status": "skipped", "shard": shard, "total_shards": total_shards}
+
+        return await _evaluate(db, http, r, lock, shard, total_shards, full)
+    finally:
+        await lock.release()
+
+
+async def _evaluate(
+    db,
+    http: HTTPClientPool,
+    r,
+    lock: RunLock,
+    shard: int,
+    total_shards: int,
+    full: bool = False,
+) -> dict:
+    rebuilt = False
+    if alert_index.is_stale(settings.ALERT_INDEX_MAX_AGE_SECONDS):
+        await alert_index.rebuild(db, settings.ALERT_PROCESS_CHUNK_SIZE)
+        # a fresh index may hold alerts (from other workers) below the watermark
+        rebuilt = True
+
+    symbols = alert_index.symbols()
+    if total_shards > 1:
+        symbols = [s for s in symbols if shard_of(s, total_shards) == shard]
+    if not symbols:
+        print(Fore.BLUE + "No active alerts.")
+        return {"message": "No active alerts"}
+
+    active_count = sum(alert_index.count(s) for s in symbols)
+    print(Fore.YELLOW + f"Found {active_count} active alerts across {len(symbols)} symbols (shard {shard}/{total_shards}, fence {lock.fence})")
+
+    last_run = RunWatermark() if full else await RunWatermark.load(r, lock.name)
+    this_run = RunWatermark()
+
+    # closed markets are skipped; open ones are checked as often as their
+    # distance to the nearest target and recent volatility call for
+    now = time.time()
+    due, closed, deferred = symbols, 0, 0
+    if settings.SCHEDULE_ADAPTIVE:
+        due, closed, deferred = check_scheduler.plan(symbols, alert_index, last_run, now)
+        if closed or deferred:
+            print(Fore.BLUE + f"{len(due)} symbols due ({closed} in closed markets, {deferred} not due yet)")
+
+    # longest-unchecked first, so the deadline doesn't cut the same tail every run
+    due = last_run.oldest_checked_first(due)
+    fetcher = QuoteFetcher(
+        client=http.client_for(settings.FINNHUB_BASE_URL),
+        bucket=run_bucket(total_shards),
+    )
+    prices = await fetcher.fetch_many(due) if due else {}
+    print(Fore.YELLOW + f"Fetched {len(prices)}/{len(due)} quotes")
+    quote_cache.put_many_soon(prices)
+    # symbols not quoted this run keep their last evaluated price, alerts and schedule
+    this_run.prices = {s: last_run.prices[s] for s in symbols if s in last_run.prices}
+    this_run.prices.update(prices)
+    this_run.alerts = {s: last_run.alerts[s] for s in symbols if s in last_run.alerts}
+    this_run.schedule = {s: last_run.schedule[s] for s in symbols if s in last_run.schedule}
+    this_run.checked = {s: last_run.checked[s] for s in symbols if s in last_run.checked}
+    this_run.checked.update(dict.fromkeys(prices, now))
+
+    # a symbol whose price hasn't moved and has no new alerts can't have crossed
+    changed = prices if rebuilt else {
+        symbol: price
+        for symbol, price in prices.items()
+        if not last_run.unchanged(symbol, price, alert_index)
+    }
+    # every alert held now for a quoted symbol is covered by this run; later ones are picked up next run
+    for symbol in prices:
+        this_run.alerts[symbol] = RunWatermark.alerts_of(alert_index, symbol)
+    if len(changed) < len(prices):
+        print(Fore.BLUE + f"Skipping {len(prices) - len(changed)} unchanged symbols")
+
+    try:
+        triggered_count = await evaluate_prices(db, r, changed, lock)
+    except RunLockLost as e:
+        print(Fore.RED + f"{e}, stopping")
+        return {"status": "aborted", "shard": shard, "total_shards": total_shards, "triggered": e.triggered}
+
+    # next checks are planned against the alerts still active after this run
+    if settings.SCHEDULE_ADAPTIVE:
+        for symbol, price in prices.items():
+            this_run.schedule[symbol] = list(check_scheduler.observe(symbol, price, alert_index, last_run, now))
+
+    # only a run that is still the latest token holder moves the watermark
+    if not await this_run.save(lock):
+        print(Fore.RED + f"Watermark not saved, a newer run took over (fence {lock.fence})")
+
+    return {
+        "status": "processed",
+        "shard": shard,
+        "total_shards": total_shards,
+        "fence": lock.fence,
+        "processed": active_count,
+        "symbols": len(symbols),
+        "due": len(due),
+        "market_closed": closed,
+        "deferred": deferred,
+        "quoted": len(prices),
+        "evaluated": len(changed),
+        "triggered": triggered_count,
+    }
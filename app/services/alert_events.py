@@ -0,0 +1,72 @@
+import json
+import time
+from app.core.config import settings
+
+# every user's notify channel; one pattern subscription per worker process
+NOTIFY_PATTERN = "user:*:alerts:notify"
+
+# consumer group shared by all WebSocket workers
+STREAM_GROUP = "ws"
+
+
+def stream_key(user_id: int) -> str:
+    """Redis stream holding the user's triggered-alert events (trimmed to ALERT_STREAM_MAXLEN)."""
+    return f"user:{user_id}:alerts:stream"
+
+
+def notify_channel(user_id: int) -> str:
+    """Pub/sub channel used to wake the user's open WebSockets."""
+    return f"user:{user_id}:alerts:notify"
+
+
+def user_id_from_channel(channel) -> int | None:
+    if isinstance(channel, bytes):
+        channel = channel.decode()
+    try:
+        return int(channel.split(":")[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def encode_event(entry_id, fields) -> str:
+    """WebSocket message for a stream entry; `id` lets clients resume and de-duplicate."""
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    data = fields.get(b"data") or fields.get("data")
+    payload = json.loads(data)
+    payload["id"] = entry_id
+    return json.dumps(payload)
+
+
+async def publish_alert_events(r, triggered):
+    """
+    Append one event per triggered alert to the user's stream and wake any
+    connected sockets. Entries stay in the stream until trimmed, so users
+    who are offline get them on their next connect.
+    """
+    if not triggered:
+        return
+
+    async with r.pipeline(transaction=False) as pipe:
+        users = set()
+        for t in triggered:
+            payload = {
+                "type": "alert_triggered",
+                "symbol": t.alert.symbol,
+                "current_price": t.price,
+                "target_price": t.alert.target_price,
+                "direction": t.alert.direction.value,
+            }
+            pipe.xadd(
+                stream_key(t.alert.user_id),
+                {"data": json.dumps(payload)},
+                maxlen=settings.ALERT_STREAM_MAXLEN,
+                approximate=True,
+            )
+            users.add(t.alert.user_id)
+
+        # the publish time lets subscribers measure fan-out latency
+        published_at = str(time.time())
+        for user_id in users:
+            pipe.publish(notify_channel(user_id), published_at)
+        await pipe.execute()
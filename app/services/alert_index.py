@@ -0,0 +1,264 @@
+import time
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import NamedTuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Alert, DirectionEnum
+
+
+# str-valued enum members hash like their values, so this maps both forms
+_DIRECTIONS = {d.value: d for d in DirectionEnum}
+
+
+class IndexedAlert(NamedTuple):
+    id: int
+    user_id: int
+    symbol: str
+    target_price: float
+    direction: DirectionEnum
+
+
+class _SymbolThresholds:
+    """ABOVE and BELOW targets for one symbol, each kept as sorted parallel arrays."""
+
+    __slots__ = ("above_targets", "above_ids", "below_targets", "below_ids", "max_id")
+
+    def __init__(self):
+        self.above_targets: list[float] = []
+        self.above_ids: list[int] = []
+        self.below_targets: list[float] = []
+        self.below_ids: list[int] = []
+        # highest id ever added; not lowered on remove
+        self.max_id = 0
+
+    def _side(self, direction: DirectionEnum):
+        if direction == DirectionEnum.ABOVE:
+            return self.above_targets, self.above_ids
+        return self.below_targets, self.below_ids
+
+    def add(self, alert: IndexedAlert):
+        targets, ids = self._side(alert.direction)
+        pos = bisect_right(targets, alert.target_price)
+        targets.insert(pos, alert.target_price)
+        ids.insert(pos, alert.id)
+        self.max_id = max(self.max_id, alert.id)
+
+    def remove(self, alert: IndexedAlert):
+        targets, ids = self._side(alert.direction)
+        lo = bisect_left(targets, alert.target_price)
+        hi = bisect_right(targets, alert.target_price)
+        for pos in range(lo, hi):
+            if ids[pos] == alert.id:
+                del targets[pos]
+                del ids[pos]
+                return
+
+    def crossed(self, price: float) -> list[int]:
+        # ABOVE fires when price > target, BELOW when price < target
+        above = self.above_ids[:bisect_left(self.above_targets, price)]
+        below = self.below_ids[bisect_right(self.below_targets, price):]
+        return above + below
+
+    def nearest_gap(self, price: float) -> float:
+        """Smallest absolute move that would cross a target (0 if one already has)."""
+        gaps = []
+        i = bisect_left(self.above_targets, price)
+        if i:
+            return 0.0
+        if i < len(self.above_targets):
+            gaps.append(self.above_targets[i] - price)
+        j = bisect_right(self.below_targets, price)
+        if j < len(self.below_targets):
+            return 0.0
+        if j:
+            gaps.append(price - self.below_targets[j - 1])
+        return min(gaps) if gaps else float("inf")
+
+    def __len__(self):
+        return len(self.above_ids) + len(self.below_ids)
+
+
+class AlertIndex:
+    """
+    In-memory index of active (untriggered) alerts keyed by symbol.
+    Finding every alert crossed by a new price is a bisect per side,
+    O(log n + k), instead of a scan over all alerts.
+    """
+
+    def __init__(self):
+        self._symbols: dict[str, _SymbolThresholds] = {}
+        self._alerts: dict[int, IndexedAlert] = {}
+        self.loaded = False
+        self.loaded_at = 0.0
+        # changes applied while a rebuild() is streaming, replayed onto its result
+        self._journals: list[_Journal] = []
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def __contains__(self, alert_id: int):
+        return alert_id in self._alerts
+
+    def symbols(self) -> list[str]:
+        return list(self._symbols)
+
+    def count(self, symbol: str) -> int:
+        thresholds = self._symbols.get(symbol)
+        return len(thresholds) if thresholds else 0
+
+    def add(self, alert):
+        """Add an Alert row (or IndexedAlert); no-op for triggered alerts."""
+        if getattr(alert, "is_triggered", False):
+            return
+        for journal in self._journals:
+            journal.ops.append((self.add, alert))
+        self._insert(alert)
+
+    def _insert(self, alert):
+        if alert.id in self._alerts:
+            self.remove(alert.id)
+
+        entry = IndexedAlert(
+            alert.id,
+            alert.user_id,
+            alert.symbol.upper(),
+            float(alert.target_price),
+            _DIRECTIONS[alert.direction],
+        )
+        self._alerts[entry.id] = entry
+        self._symbols.setdefault(entry.symbol, _SymbolThresholds()).add(entry)
+
+    def remove(self, alert_id: int) -> IndexedAlert | None:
+        for journal in self._journals:
+            journal.ops.append((self.remove, alert_id))
+        entry = self._alerts.pop(alert_id, None)
+        if entry is None:
+            return None
+
+        thresholds = self._symbols[entry.symbol]
+        thresholds.remove(entry)
+        if not len(thresholds):
+            del self._symbols[entry.symbol]
+        return entry
+
+    def max_id(self, symbol: str) -> int:
+        """Highest alert id added for `symbol` (0 if none)."""
+        thresholds = self._symbols.get(symbol)
+        return thresholds.max_id if thresholds else 0
+
+    def nearest_gap(self, symbol: str, price: float) -> float:
+        """Price move on `symbol` needed to fire its nearest alert (inf if none)."""
+        thresholds = self._symbols.get(symbol)
+        return thresholds.nearest_gap(price) if thresholds else float("inf")
+
+    def crossed(self, symbol: str, price: float) -> list[IndexedAlert]:
+        """Every active alert on `symbol` whose target `price` has crossed."""
+        thresholds = self._symbols.get(symbol)
+        if thresholds is None:
+            return []
+        return [self._alerts[i] for i in thresholds.crossed(price)]
+
+    def load(self, alerts):
+        """Replace the index contents; sorts each array once instead of inserting one by one."""
+        builder = _IndexBuilder()
+        builder.extend(alerts)
+        self._install(builder)
+
+    def _install(self, builder: "_IndexBuilder"):
+        self._symbols, self._alerts = builder.finish()
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+
+    def mark_stale(self):
+        """Force a rebuild on next use (e.g. after missing change events)."""
+        self.loaded_at = 0.0
+        self.loaded = False
+        for journal in self._journals:
+            journal.stale = True
+
+    def is_stale(self, max_age: float) -> bool:
+        return not self.loaded or time.monotonic() - self.loaded_at > max_age
+
+    async def rebuild(self, db: AsyncSession, chunk_size: int = 1000):
+        """
+        Reload every untriggered alert from the alerts table through a
+        server-side cursor, `chunk_size` rows at a time, so the full result
+        set is never held in memory next to the index being built.
+
+        add()/remove() calls made while the rows stream (IndexSync events,
+        create_alert, evaluation) still hit the current index and are also
+        journaled, then replayed in order onto the new one before it serves.
+        """
+        journal = _Journal()
+        self._journals.append(journal)
+        try:
+            builder = await self._stream(db, chunk_size)
+        finally:
+            self._journals.remove(journal)
+        self._install(builder)
+        for op, arg in journal.ops:
+            op(arg)
+        if journal.stale:
+            # events were missed mid-rebuild; the snapshot may predate them
+            self.mark_stale()
+
+    async def _stream(self, db: AsyncSession, chunk_size: int) -> "_IndexBuilder":
+        result = await db.stream(
+            select(
+                Alert.id,
+                Alert.user_id,
+                Alert.symbol,
+                Alert.target_price,
+                Alert.direction,
+            )
+            .where(Alert.is_triggered == False)
+            .execution_options(yield_per=chunk_size)
+        )
+        builder = _IndexBuilder()
+        async for rows in result.partitions():
+            builder.extend(rows)
+        return builder
+
+
+class _Journal:
+    """add/remove calls seen during one rebuild()."""
+
+    def __init__(self):
+        self.ops: list[tuple] = []
+        self.stale = False
+
+
+class _IndexBuilder:
+    """Collects alerts per symbol and side, then sorts each side once in finish()."""
+
+    def __init__(self):
+        self.alerts: dict[int, IndexedAlert] = {}
+        self.sides: dict[str, tuple[list[IndexedAlert], list[IndexedAlert]]] = {}
+
+    def extend(self, rows):
+        alerts, sides = self.alerts, self.sides
+        for a in rows:
+            entry = IndexedAlert(a.id, a.user_id, a.symbol.upper(), float(a.target_price), _DIRECTIONS[a.direction])
+            alerts[entry.id] = entry
+            above, below = sides.get(entry.symbol) or sides.setdefault(entry.symbol, ([], []))
+            (above if entry.direction == DirectionEnum.ABOVE else below).append(entry)
+
+    def finish(self) -> tuple[dict[str, _SymbolThresholds], dict[int, IndexedAlert]]:
+        key = itemgetter(3, 0)  # (target_price, id)
+        symbols: dict[str, _SymbolThresholds] = {}
+        for symbol, (above, below) in self.sides.items():
+            thresholds = symbols[symbol] = _SymbolThresholds()
+            above.sort(key=key)
+            below.sort(key=key)
+            thresholds.above_targets = [e.target_price for e in above]
+            thresholds.above_ids = [e.id for e in above]
+            thresholds.below_targets = [e.target_price for e in below]
+            thresholds.below_ids = [e.id for e in below]
+            thresholds.max_id = max(thresholds.above_ids + thresholds.below_ids)
+        self.sides = {}
+        return symbols, self.alerts
+
+
+# process-wide index, rebuilt on startup and kept current by the alert routes
+alert_index = AlertIndex()
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
@@ -19,6 +21,50 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+
+# bcrypt takes ~200 ms of CPU per call; run it on a bounded pool so it never
+# blocks the event loop (bcrypt releases the GIL, so threads run in parallel)
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_hash_queue_depth = 0
+
+
+async def _run_in_hash_pool(fn, *args):
+    global _hash_queue_depth
+    if _hash_queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    _hash_queue_depth += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+    finally:
+        _hash_queue_depth -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain, hashed)
+
+
+def hash_pool_metrics() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "queue_depth": _hash_queue_depth,
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+    }
+
+
+def shutdown_hash_pool():
+    _hash_pool.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(user_id: int):
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": str(user_id), "exp": expire}
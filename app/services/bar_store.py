@@ -0,0 +1,212 @@
+import time
+from typing import NamedTuple
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from colorama import Fore
+from app.core.http_client import HTTPClientPool
+from app.db.models import PriceBar, PriceBarSync
+from app.db.session import AsyncSessionLocal
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/"
+
+# Yahoo interval -> longest history (days) Yahoo serves at that granularity
+INTERVALS = {
+    "1m": 7,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "1h": 730,
+    "1d": None,
+    "1wk": None,
+    "1mo": None,
+}
+# kept clear of the lookback edge, which Yahoo rejects
+LOOKBACK_MARGIN_SECONDS = 3600
+
+
+def oldest_fetchable(interval: str, now: int) -> int:
+    """Earliest bar time Yahoo still serves for `interval` (0 if unlimited)."""
+    days = INTERVALS.get(interval)
+    if days is None:
+        return 0
+    return now - days * 24 * 60 * 60 + LOOKBACK_MARGIN_SECONDS
+
+
+class SyncState(NamedTuple):
+    first_ts: int
+    last_ts: int
+    synced_at: datetime
+
+
+async def fetch_yahoo_bars(http: HTTPClientPool, symbol: str, start: int, end: int, interval: str) -> list[dict]:
+    """Bars between two epoch-second timestamps, as PriceBar rows."""
+    url = (
+        f"{YAHOO_CHART_URL}"
+        f"{symbol}?period1={start}&period2={end}&interval={interval}&events=history"
+    )
+
+    headers = {
+        "User-Agent": "Mozilla/5.0"
+    }
+
+    resp = await http.client_for(url).get(url, headers=headers)
+
+    if resp.status_code != 200 or not resp.text.strip():
+        raise HTTPException(status_code=502, detail="Yahoo Finance API blocked the request")
+
+    data = resp.json()
+
+    try:
+        result = data["chart"]["result"][0]
+    except Exception:
+        raise HTTPException(status_code=404, detail="No chart data available")
+
+    # a valid symbol with no trading in the window has no timestamps
+    timestamps = result.get("timestamp") or []
+    if not timestamps:
+        return []
+    quotes = result["indicators"]["quote"][0]
+    volumes = quotes.get("volume") or [None] * len(timestamps)
+
+    return [
+        {
+            "symbol": symbol,
+            "interval": interval,
+            "ts": ts,
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "volume": v,
+        }
+        for ts, o, h, l, c, v in zip(
+            timestamps, quotes["open"], quotes["high"], quotes["low"], quotes["close"], volumes
+        )
+    ]
+
+
+class BarStore:
+    """
+    Local OHLC store in the price_bars table, filled incrementally from Yahoo.
+
+    price_bar_sync records the stored range per (symbol, interval). A request
+    only fetches what is missing: older bars when asked for a longer range,
+    and bars after the last stored one once the range was last extended
+    forward more than `ttl` ago. If Yahoo fails, whatever is stored is served.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def get_columns(self, http: HTTPClientPool, symbol: str, interval: str, start: int, ttl: float) -> dict:
+        now = int(time.time())
+        # every fill stays inside Yahoo's lookback; older bars already stored are still served
+        oldest = oldest_fetchable(interval, now)
+        fill_start = max(start, oldest)
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(PriceBarSync.first_ts, PriceBarSync.last_ts, PriceBarSync.synced_at).where(
+                    PriceBarSync.symbol == symbol, PriceBarSync.interval == interval
+                )
+            )
+            sync = result.one_or_none()
+
+            try:
+                if sync is None:
+                    sync = await self._fill(db, http, symbol, interval, fill_start, now, sync)
+                else:
+                    if fill_start < sync.first_ts:
+                        sync = await self._fill(db, http, symbol, interval, fill_start, sync.first_ts, sync, forward=False)
+                    if now - sync.synced_at.timestamp() > ttl:
+                        # from the last stored bar, which may still have been forming
+                        # (re-fetched, it replaces the stored row); after an idle gap
+                        # longer than Yahoo's lookback, the gap is left unfilled
+                        forward_start = max(sync.last_ts, oldest)
+                        sync = await self._fill(db, http, symbol, interval, forward_start, now, sync)
+            except Exception as e:
+                await db.rollback()
+                if sync is None:
+                    raise
+                print(Fore.YELLOW + f"Bar sync failed for {symbol}/{interval}, serving stored bars: {e}")
+
+            result = await db.execute(
+                select(
+                    PriceBar.ts,
+                    PriceBar.open,
+                    PriceBar.high,
+                    PriceBar.low,
+                    PriceBar.close,
+                    PriceBar.volume,
+                )
+                .where(PriceBar.symbol == symbol, PriceBar.interval == interval, PriceBar.ts >= start)
+                .order_by(PriceBar.ts)
+            )
+            rows = result.all()
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="No chart data available")
+
+        # transpose rows into the columnar shape in one pass
+        ts, opens, highs, lows, closes, volumes = map(list, zip(*rows))
+        return {
+            "time": [t * 1000 for t in ts],
+            "open": opens,
+            "high": highs,
+            "low": lows,
+            "close": closes,
+            "volume": volumes,
+        }
+
+    async def _fill(
+        self,
+        db,
+        http: HTTPClientPool,
+        symbol: str,
+        interval: str,
+        start: int,
+        end: int,
+        sync,
+        forward: bool = True,
+    ):
+        """
+        Store bars in [start, end] and widen the recorded range. Only a
+        forward fill (up to now) moves synced_at; a backfill of older bars
+        says nothing about how current the newest ones are.
+        """
+        bars = await fetch_yahoo_bars(http, symbol, start, end, interval)
+
+        if bars:
+            stmt = insert(PriceBar)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PriceBar.symbol, PriceBar.interval, PriceBar.ts],
+                set_={
+                    "open": stmt.excluded.open,
+                    "high": stmt.excluded.high,
+                    "low": stmt.excluded.low,
+                    "close": stmt.excluded.close,
+                    "volume": stmt.excluded.volume,
+                },
+            )
+            await db.execute(stmt, bars)
+
+        first_ts = min(start, sync.first_ts) if sync else start
+        last_ts = max([b["ts"] for b in bars] + ([sync.last_ts] if sync else [start]))
+        synced_at = datetime.now(timezone.utc) if forward or sync is None else sync.synced_at
+
+        stmt = insert(PriceBarSync).values(
+            symbol=symbol, interval=interval, first_ts=first_ts, last_ts=last_ts, synced_at=synced_at
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[PriceBarSync.symbol, PriceBarSync.interval],
+                set_={"first_ts": first_ts, "last_ts": last_ts, "synced_at": synced_at},
+            )
+        )
+        await db.commit()
+        return SyncState(first_ts, last_ts, synced_at)
+
+
+bar_store = BarStore()
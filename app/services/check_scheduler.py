@@ -0,0 +1,91 @@
+import math
+from datetime import datetime, timezone
+from typing import NamedTuple
+from app.core.config import settings
+from app.services.alert_index import AlertIndex
+from app.services.market_calendar import is_market_open
+
+
+class SymbolSchedule(NamedTuple):
+    """Adaptive check state for one symbol, stored in the run watermark."""
+    checked_at: float
+    # EWMA of squared log returns per second; None until two quotes are seen
+    variance: float | None
+    next_due: float
+
+
+class CheckScheduler:
+    """
+    Decides which symbols a run quotes.
+
+    - symbols whose exchange is closed are skipped (their price can't move)
+    - while open, a symbol is re-checked after roughly
+      `safety * gap² / variance` seconds: the nearest active target's
+      relative distance from the last price, against recent volatility,
+      clamped to [min_interval, max_interval]
+    - symbols with alerts the watermark hasn't covered, or never quoted,
+      are always due so a fresh alert is evaluated once even in a closed market
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        safety: float,
+        halflife: float,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.safety = safety
+        self.halflife = halflife
+
+    def plan(self, symbols, index: AlertIndex, last_run, now: float) -> tuple[list[str], int, int]:
+        """(due symbols, skipped as market closed, skipped as not yet due)."""
+        moment = datetime.fromtimestamp(now, timezone.utc)
+        due, closed, deferred = [], 0, 0
+        for symbol in symbols:
+            entry = last_run.schedule.get(symbol)
+            if entry is None or last_run.has_new_alerts(symbol, index):
+                due.append(symbol)
+            elif not is_market_open(symbol, moment):
+                closed += 1
+            elif SymbolSchedule(*entry).next_due <= now:
+                due.append(symbol)
+            else:
+                deferred += 1
+        return due, closed, deferred
+
+    def observe(self, symbol: str, price: float, index: AlertIndex, last_run, now: float) -> SymbolSchedule:
+        """Fold a new quote into the symbol's volatility and pick its next check."""
+        entry = last_run.schedule.get(symbol)
+        previous = last_run.prices.get(symbol)
+        variance = None
+        if entry is not None:
+            checked_at, variance, _ = entry
+            dt = now - checked_at
+            # ignore gaps spanning a closed market; they say nothing about intraday moves
+            if previous and price > 0 and 0 < dt <= 2 * self.max_interval:
+                sample = math.log(price / previous) ** 2 / dt
+                if variance is None:
+                    variance = sample
+                else:
+                    alpha = 1 - 0.5 ** (dt / self.halflife)
+                    variance += alpha * (sample - variance)
+
+        gap = index.nearest_gap(symbol, price) / price if price > 0 else 0.0
+        if variance is None or gap == 0.0:
+            interval = self.min_interval
+        elif variance <= 0.0:
+            interval = self.max_interval
+        else:
+            interval = self.safety * gap * gap / variance
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        return SymbolSchedule(now, variance, now + interval)
+
+
+check_scheduler = CheckScheduler(
+    min_interval=settings.SCHEDULE_MIN_INTERVAL_SECONDS,
+    max_interval=settings.SCHEDULE_MAX_INTERVAL_SECONDS,
+    safety=settings.SCHEDULE_SAFETY_FACTOR,
+    halflife=settings.SCHEDULE_VOLATILITY_HALFLIFE_SECONDS,
+)
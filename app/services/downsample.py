@@ -0,0 +1,85 @@
+"""
+Server-side downsampling of OHLC columns so chart payloads stay bounded.
+
+Both helpers take and return the columnar dict used by /stock/history:
+{"time": [...], "open": [...], "high": [...], "low": [...], "close": [...], "volume": [...]}
+"""
+
+
+def ohlc_buckets(columns: dict, max_points: int) -> dict:
+    """
+    Aggregate consecutive candles into at most `max_points` buckets:
+    first open, max high, min low, last close, summed volume.
+    Missing (None) values from upstream are skipped.
+    """
+    times = columns["time"]
+    n = len(times)
+    if n <= max_points:
+        return columns
+
+    opens, highs, lows = columns["open"], columns["high"], columns["low"]
+    closes, volumes = columns["close"], columns["volume"]
+    out = {"time": [], "open": [], "high": [], "low": [], "close": [], "volume": []}
+
+    for b in range(max_points):
+        lo = b * n // max_points
+        hi = (b + 1) * n // max_points
+
+        o = next((x for x in opens[lo:hi] if x is not None), None)
+        c = next((x for x in reversed(closes[lo:hi]) if x is not None), None)
+        bucket_highs = [x for x in highs[lo:hi] if x is not None]
+        bucket_lows = [x for x in lows[lo:hi] if x is not None]
+        bucket_volumes = [x for x in volumes[lo:hi] if x is not None]
+
+        out["time"].append(times[lo])
+        out["open"].append(o)
+        out["high"].append(max(bucket_highs) if bucket_highs else None)
+        out["low"].append(min(bucket_lows) if bucket_lows else None)
+        out["close"].append(c)
+        out["volume"].append(sum(bucket_volumes) if bucket_volumes else None)
+
+    return out
+
+
+def lttb(columns: dict, max_points: int) -> dict:
+    """
+    Largest-Triangle-Three-Buckets on the close line. Keeps the points that
+    preserve the visual shape; returns {"time": [...], "close": [...]}.
+    """
+    points = [(t, c) for t, c in zip(columns["time"], columns["close"]) if c is not None]
+    n = len(points)
+    if n <= max_points:
+        return {"time": [t for t, _ in points], "close": [c for _, c in points]}
+    if max_points < 3:
+        # no room for a middle bucket: the endpoints (or just the last point)
+        points = [points[0], points[-1]] if max_points == 2 else points[-1:]
+        return {"time": [t for t, _ in points], "close": [c for _, c in points]}
+
+    sampled = [points[0]]
+    every = (n - 2) / (max_points - 2)
+    a = 0
+
+    for i in range(max_points - 2):
+        # average of the next bucket is the third triangle corner
+        next_lo = int((i + 1) * every) + 1
+        next_hi = min(int((i + 2) * every) + 1, n)
+        next_bucket = points[next_lo:next_hi]
+        avg_t = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_c = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        at, ac = points[a]
+
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            t, c = points[j]
+            area = abs((at - avg_t) * (c - ac) - (at - t) * (avg_c - ac))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return {"time": [t for t, _ in sampled], "close": [c for _, c in sampled]}
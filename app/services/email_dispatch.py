@@ -0,0 +1,230 @@
+import asyncio
+import random
+from typing import NamedTuple
+import httpx
+from colorama import Fore
+from app.core.config import settings
+from app.services.email_service import ALERT_HTML, ALERT_SUBJECT, alert_substitutions
+
+# SendGrid accepts at most 1000 personalizations per /v3/mail/send call
+MAX_PERSONALIZATIONS = 1000
+
+
+class SendRejected(RuntimeError):
+    """SendGrid refused the request (4xx other than 429); retrying it as-is won't help."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"SendGrid {status}: {detail}")
+        self.status = status
+
+
+class AlertEmail(NamedTuple):
+    to: str
+    symbol: str
+    price: float
+    target: float
+
+
+class EmailDispatcher:
+    """
+    Batched SendGrid sender for alert emails.
+
+    - bounded queue: submit() never waits, so the trigger path isn't held
+      up by a slow SendGrid; emails that don't fit are dropped and counted.
+      The queue is in memory only: emails still queued when the process
+      dies are not sent
+    - `workers` tasks each take up to `batch_size` queued emails (waiting at
+      most `batch_wait` seconds to fill a batch) and send them in one
+      /v3/mail/send call, one personalization per recipient
+    - 429 / 5xx / network errors retried with exponential backoff,
+      honouring Retry-After
+    - a batch rejected with a 4xx (e.g. one malformed address) is split in
+      halves until the bad recipients are isolated, so the rest still go out
+    - stop() drains what is queued before shutting down
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str | None,
+        from_email: str | None,
+        queue_size: int,
+        batch_size: int,
+        batch_wait: float,
+        workers: int,
+        max_retries: int,
+        backoff_base: float = 0.5,
+    ):
+        self.send_url = f"{api_url.rstrip('/')}/v3/mail/send"
+        self.api_key = api_key
+        self.from_email = from_email
+        self.batch_size = min(batch_size, MAX_PERSONALIZATIONS)
+        self.batch_wait = batch_wait
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.queue: asyncio.Queue[AlertEmail] = asyncio.Queue(maxsize=queue_size)
+        self.client: httpx.AsyncClient | None = None
+        self._tasks: list[asyncio.Task] = []
+
+        # metrics
+        self.submitted = 0
+        self.sent = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+        self.splits = 0
+        self.dropped = 0
+        self.last_error: str | None = None
+
+    def start(self, client: httpx.AsyncClient):
+        """Start the send workers on a shared keep-alive client."""
+        self.client = client
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            print(Fore.RED + f"Email queue not drained, {self.queue.qsize()} emails left unsent")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, email: AlertEmail) -> bool:
+        try:
+            self.queue.put_nowait(email)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(Fore.RED + f"Email queue full, dropped alert email to {email.to}")
+            return False
+        self.submitted += 1
+        return True
+
+    async def _next_batch(self) -> list[AlertEmail]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _deliver(self, batch: list[AlertEmail]):
+        try:
+            await self._send(batch)
+        except SendRejected as e:
+            # auth errors reject every request alike; anything else may be one bad recipient
+            if len(batch) > 1 and e.status not in (401, 403):
+                self.splits += 1
+                mid = len(batch) // 2
+                await self._deliver(batch[:mid])
+                await self._deliver(batch[mid:])
+                return
+            self._fail(batch, e)
+        except Exception as e:
+            self._fail(batch, e)
+
+    def _fail(self, batch: list[AlertEmail], error: Exception):
+        self.failed += len(batch)
+        self.last_error = str(error)
+        if len(batch) == 1:
+            print(Fore.RED + f"Alert email to {batch[0].to} failed: {error}")
+        else:
+            print(Fore.RED + f"SendGrid batch of {len(batch)} failed: {error}")
+
+    def _payload(self, batch: list[AlertEmail]) -> dict:
+        return {
+            "personalizations": [
+                {
+                    "to": [{"email": e.to}],
+                    "substitutions": alert_substitutions(e.symbol, e.price, e.target),
+                }
+                for e in batch
+            ],
+            "from": {"email": self.from_email},
+            "subject": ALERT_SUBJECT,
+            "content": [{"type": "text/html", "value": ALERT_HTML}],
+        }
+
+    async def _send(self, batch: list[AlertEmail]):
+        if not self.api_key:
+            raise RuntimeError("SENDGRID_API_KEY is not set")
+
+        payload = self._payload(batch)
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                resp = await self.client.post(self.send_url, json=payload, headers=headers)
+                if resp.status_code < 300:
+                    self.sent += len(batch)
+                    self.batches += 1
+                    print(Fore.GREEN + f"✅ Sent {len(batch)} alert emails")
+                    return
+                if resp.status_code != 429 and resp.status_code < 500:
+                    raise SendRejected(resp.status_code, resp.text[:200])
+                self.last_error = f"SendGrid {resp.status_code}"
+                retry_after = resp.headers.get("Retry-After")
+            except httpx.TransportError as e:
+                self.last_error = str(e)
+
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = self.backoff_base * 2 ** attempt + random.uniform(0, self.backoff_base)
+            await asyncio.sleep(delay)
+
+        raise RuntimeError(f"gave up after {self.max_retries + 1} attempts ({self.last_error})")
+
+    def metrics(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed": self.failed,
+            "splits": self.splits,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+
+email_dispatcher = EmailDispatcher(
+    api_url=settings.SENDGRID_API_URL,
+    api_key=settings.SENDGRID_API_KEY,
+    from_email=settings.EMAIL_FROM,
+    queue_size=settings.EMAIL_QUEUE_SIZE,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    batch_wait=settings.EMAIL_BATCH_WAIT_SECONDS,
+    workers=settings.EMAIL_SEND_CONCURRENCY,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+)
@@ -1,22 +1,8 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from app.core.config import settings
+# %symbol%, %price% and %target% are filled in per recipient; the batched
+# dispatcher passes them to SendGrid as personalization substitutions
+ALERT_SUBJECT = "🚨 Stock Alert Triggered: %symbol%"
 
-
-def send_alert_email(
-    to_email: str,
-    symbol: str,
-    price: float,
-    target: float,
-):
-    """
-    Send stock alert email using SendGrid API
-    (Render-safe, production-ready)
-    """
-
-    subject = f"🚨 Stock Alert Triggered: {symbol}"
-
-    html = f"""
+ALERT_HTML = """
     <html>
       <body style="background:#0f172a;font-family:Arial;padding:40px;">
         <div style="max-width:600px;margin:auto;background:#020617;border-radius:14px;padding:30px;border:1px solid #1e293b;">
@@ -32,12 +18,12 @@ def send_alert_email(
           </p>
 
           <div style="background:#020617;padding:20px;border-radius:12px;border:1px solid #1f2937;margin:20px 0;">
-            <h2 style="color:#60a5fa;margin:0;">{symbol}</h2>
+            <h2 style="color:#60a5fa;margin:0;">%symbol%</h2>
             <p style="color:#d1d5db;margin:6px 0;">
-              Target Price: <b style="color:#fbbf24">${target}</b>
+              Target Price: <b style="color:#fbbf24">$%target%</b>
             </p>
             <p style="color:#d1d5db;margin:6px 0;">
-              Current Price: <b style="color:#34d399">${price}</b>
+              Current Price: <b style="color:#34d399">$%price%</b>
             </p>
           </div>
 
@@ -52,18 +38,9 @@ def send_alert_email(
         </div>
       </body>
     </html>
-    """
+"""
+
 
-    message = Mail(
-        from_email=settings.EMAIL_FROM,
-        to_emails=to_email,
-        subject=subject,
-        html_content=html,
-    )
+def alert_substitutions(symbol: str, price: float, target: float) -> dict[str, str]:
+    return {"%symbol%": symbol, "%price%": str(price), "%target%": str(target)}
 
-    try:
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        sg.send(message)
-        print(f"✅ Email sent to {to_email}")
-    except Exception as e:
-        print(f"❌ SendGrid email failed: {e}")
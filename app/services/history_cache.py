@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+import redis.asyncio as redis
+from colorama import Fore
+from app.core.config import settings
+
+
+class HistoryCache:
+    """
+    Two-tier cache for upstream chart data:
+
+    - in-process LRU, optional shared Redis tier (HISTORY_CACHE_REDIS)
+    - per-entry TTL chosen by the caller (e.g. by period)
+    - single-flight: concurrent misses for a key share one upstream fetch
+    - entries are kept HISTORY_STALE_SECONDS past their TTL and served if
+      the upstream fetch fails
+    """
+
+    def __init__(self, max_size: int, stale_seconds: float, use_redis: bool = False):
+        self.max_size = max_size
+        self.stale_seconds = stale_seconds
+        self.use_redis = use_redis
+        # key -> (fresh_until, stale_until, value); wall-clock so Redis entries compare
+        self._entries: OrderedDict[str, tuple[float, float, object]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._redis = None
+
+        # metrics
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.upstream_errors = 0
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"history:{key}"
+
+    def _store_local(self, key: str, fresh_until: float, stale_until: float, value):
+        self._entries[key] = (fresh_until, stale_until, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _load_shared(self, key: str):
+        try:
+            raw = await self._client().get(self._redis_key(key))
+        except Exception as e:
+            print(Fore.RED + f"History cache Redis read failed: {e}")
+            return None
+        if not raw:
+            return None
+        entry = json.loads(raw)
+        return entry["fresh_until"], entry["stale_until"], entry["value"]
+
+    async def _store_shared(self, key: str, fresh_until: float, stale_until: float, value):
+        try:
+            await self._client().set(
+                self._redis_key(key),
+                json.dumps({"fresh_until": fresh_until, "stale_until": stale_until, "value": value}),
+                ex=max(1, int(stale_until - time.time())),
+            )
+        except Exception as e:
+            print(Fore.RED + f"History cache Redis write failed: {e}")
+
+    async def get_or_fetch(self, key: str, ttl: float, fetch):
+        """Return the cached value for `key`, calling `fetch()` at most once per key at a time."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+        if self.use_redis:
+            shared = await self._load_shared(key)
+            if shared and shared[0] > now:
+                self._store_local(key, *shared)
+                self.redis_hits += 1
+                return shared[2]
+            entry = entry or shared
+
+        # the fetch runs in its own task so a client that disconnects
+        # doesn't cancel it for everyone else waiting on the same key
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            self.misses += 1
+            inflight = asyncio.create_task(self._refresh(key, ttl, fetch, entry))
+            self._inflight[key] = inflight
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(inflight)
+
+    async def _refresh(self, key: str, ttl: float, fetch, entry):
+        try:
+            value = await fetch()
+        except Exception as e:
+            self.upstream_errors += 1
+            if entry and entry[1] > time.time():
+                self.stale_served += 1
+                print(Fore.YELLOW + f"Serving stale history for {key}: {e}")
+                return entry[2]
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        fresh_until = time.time() + ttl
+        stale_until = fresh_until + self.stale_seconds
+        self._store_local(key, fresh_until, stale_until, value)
+        if self.use_redis:
+            await self._store_shared(key, fresh_until, stale_until, value)
+        return value
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def metrics(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "upstream_errors": self.upstream_errors,
+        }
+
+
+history_cache = HistoryCache(
+    max_size=settings.HISTORY_CACHE_MAX_SIZE,
+    stale_seconds=settings.HISTORY_STALE_SECONDS,
+    use_redis=settings.HISTORY_CACHE_REDIS,
+)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import redis.asyncio as redis
+from colorama import Fore
+from app.core.config import settings
+from app.services.alert_index import IndexedAlert, alert_index
+
+# alert create/delete events from the web tier, applied by evaluator processes
+INDEX_CHANNEL = "alerts:index:changes"
+
+_publisher = None
+
+
+def _client():
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.from_url(settings.REDIS_URL)
+    return _publisher
+
+
+async def publish_index_change(op: str, alert=None, alert_id: int | None = None):
+    """Tell other processes' alert indexes about an added ("add") or deleted ("remove") alert."""
+    if op == "add":
+        message = {
+            "op": "add",
+            "alert": {
+                "id": alert.id,
+                "user_id": alert.user_id,
+                "symbol": alert.symbol,
+                "target_price": float(alert.target_price),
+                "direction": alert.direction.value,
+            },
+        }
+    else:
+        message = {"op": "remove", "id": alert_id}
+    try:
+        await _client().publish(INDEX_CHANNEL, json.dumps(message))
+    except Exception as e:
+        # the periodic index rebuild picks the change up instead
+        print(Fore.RED + f"Index change publish failed: {e}")
+
+
+async def close_publisher():
+    global _publisher
+    if _publisher is not None:
+        await _publisher.aclose()
+        _publisher = None
+
+
+class IndexSync:
+    """
+    Keeps this process's alert index in step with alerts created and deleted
+    through the API in other processes. If the subscription drops, changes
+    may have been missed, so the index is marked stale and rebuilt on its
+    next use.
+    """
+
+    def __init__(self):
+        self.redis = None
+        self._listener: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+        self.applied = 0
+        self.resubscribes = 0
+
+    async def start(self, timeout: float = 5.0):
+        """Start listening; waits (up to `timeout`) for the first subscription."""
+        self.redis = redis.from_url(settings.REDIS_URL)
+        self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(Fore.RED + "Index sync not subscribed yet; relying on index rebuilds until it is")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    def apply(self, message: dict):
+        if message.get("op") == "add":
+            alert_index.add(IndexedAlert(**message["alert"]))
+        elif message.get("op") == "remove":
+            alert_index.remove(message["id"])
+        self.applied += 1
+
+    async def _listen(self):
+        backoff = 1.0
+        first = True
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INDEX_CHANNEL)
+                print(Fore.GREEN + f"Index sync subscribed to {INDEX_CHANNEL}")
+                self._subscribed.set()
+                backoff = 1.0
+                if not first:
+                    self.resubscribes += 1
+                    alert_index.mark_stale()
+                first = False
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.apply(json.loads(message["data"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(Fore.RED + f"Bad index change message: {e}")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(Fore.RED + f"Index sync subscription lost: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def metrics(self) -> dict:
+        return {"applied": self.applied, "resubscribes": self.resubscribes}
@@ -0,0 +1,92 @@
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo
+
+# NYSE / Nasdaq full-day closures; extend every year from the NYSE holiday page
+US_HOLIDAYS = {
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+    date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+    date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3),
+    date(2026, 5, 25), date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7),
+    date(2026, 11, 26), date(2026, 12, 25),
+    date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26),
+    date(2027, 5, 31), date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6),
+    date(2027, 11, 25), date(2027, 12, 24),
+}
+
+# 13:00 closes
+US_EARLY_CLOSES = {
+    date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24),
+    date(2026, 11, 27), date(2026, 12, 24),
+    date(2027, 11, 26),
+}
+
+
+class Exchange:
+    """Regular trading session of one exchange, in its local time zone."""
+
+    def __init__(
+        self,
+        name: str,
+        tz: str,
+        opens: time,
+        closes: time,
+        holidays: set[date] | None = None,
+        early_closes: dict[date, time] | None = None,
+        always_open: bool = False,
+    ):
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.opens = opens
+        self.closes = closes
+        self.holidays = holidays or set()
+        self.early_closes = early_closes or {}
+        self.always_open = always_open
+
+    def is_open(self, now: datetime | None = None) -> bool:
+        if self.always_open:
+            return True
+        local = (now or datetime.now(timezone.utc)).astimezone(self.tz)
+        day = local.date()
+        if local.weekday() >= 5 or day in self.holidays:
+            return False
+        closes = self.early_closes.get(day, self.closes)
+        return self.opens <= local.time() < closes
+
+
+US = Exchange(
+    "US", "America/New_York", time(9, 30), time(16, 0),
+    holidays=US_HOLIDAYS,
+    early_closes={d: time(13, 0) for d in US_EARLY_CLOSES},
+)
+ALWAYS_OPEN = Exchange("24/7", "UTC", time(0, 0), time(0, 0), always_open=True)
+
+# Yahoo-style suffixes; weekends only, no holiday lists for these
+SUFFIX_EXCHANGES = {
+    ".L": Exchange("LSE", "Europe/London", time(8, 0), time(16, 30)),
+    ".TO": Exchange("TSX", "America/Toronto", time(9, 30), time(16, 0)),
+    ".NS": Exchange("NSE", "Asia/Kolkata", time(9, 15), time(15, 30)),
+    ".BO": Exchange("BSE", "Asia/Kolkata", time(9, 15), time(15, 30)),
+    ".HK": Exchange("HKEX", "Asia/Hong_Kong", time(9, 30), time(16, 0)),
+    ".DE": Exchange("XETRA", "Europe/Berlin", time(9, 0), time(17, 30)),
+}
+
+
+def exchange_for(symbol: str) -> Exchange:
+    """
+    Exchange a symbol trades on: Finnhub "VENUE:PAIR" symbols (crypto, FX)
+    are treated as always open, known suffixes map to their exchange, and
+    everything else is a US listing.
+    """
+    if ":" in symbol:
+        return ALWAYS_OPEN
+    dot = symbol.rfind(".")
+    if dot > 0:
+        exchange = SUFFIX_EXCHANGES.get(symbol[dot:])
+        if exchange is not None:
+            return exchange
+    return US
+
+
+def is_market_open(symbol: str, now: datetime | None = None) -> bool:
+    return exchange_for(symbol).is_open(now)
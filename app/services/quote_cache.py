@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+import redis.asyncio as redis
+from colorama import Fore
+from app.core.config import settings
+
+
+class Quote(NamedTuple):
+    price: float
+    ts: float  # epoch seconds the price was fetched
+
+
+class QuoteCache:
+    """
+    Latest price per symbol, filled by the evaluator and trade feed and read
+    by /stock/quotes.
+
+    - in-process LRU in front of Redis (`quote:{SYMBOL}`), so quotes fetched
+      by the worker are visible to every web process
+    - a quote is fresh for `ttl` seconds; Redis keeps it `retain` seconds so
+      the last known price can still be served if upstream fails
+    - get_or_fetch() reads many symbols in one MGET and sends only the stale
+      ones upstream; a symbol already being fetched by another request is
+      waited on, not fetched again
+    """
+
+    def __init__(self, ttl: float, retain: float, max_size: int, use_redis: bool = True):
+        self.ttl = ttl
+        self.retain = retain
+        self.max_size = max_size
+        self.use_redis = use_redis
+        self._entries: OrderedDict[str, Quote] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._redis = None
+        # background Redis writes and upstream batches, held until done
+        self._writes: set[asyncio.Task] = set()
+        self._fetches: set[asyncio.Task] = set()
+
+        # metrics
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_symbols = 0
+        self.stale_served = 0
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return f"quote:{symbol}"
+
+    def _store_local(self, symbol: str, quote: Quote):
+        current = self._entries.get(symbol)
+        if current is None or current.ts <= quote.ts:
+            self._entries[symbol] = quote
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def fresh(self, quote: Quote | None, now: float | None = None) -> bool:
+        return quote is not None and (now or time.time()) - quote.ts < self.ttl
+
+    def put_many_soon(self, prices: dict[str, float]):
+        """put_many() for hot paths: the local tier now, Redis in a tracked background task."""
+        ts = time.time()
+        for symbol, price in prices.items():
+            self._store_local(symbol, Quote(price, ts))
+        if not self.use_redis or not prices:
+            return
+        task = asyncio.create_task(self._write_shared(prices, ts))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def put_many(self, prices: dict[str, float], ts: float | None = None):
+        ts = ts or time.time()
+        for symbol, price in prices.items():
+            self._store_local(symbol, Quote(price, ts))
+        if not self.use_redis or not prices:
+            return
+        await self._write_shared(prices, ts)
+
+    async def _write_shared(self, prices: dict[str, float], ts: float):
+        try:
+            async with self._client().pipeline(transaction=False) as pipe:
+                for symbol, price in prices.items():
+                    pipe.set(self._key(symbol), json.dumps([price, ts]), px=int(self.retain * 1000))
+                await pipe.execute()
+        except Exception as e:
+            print(Fore.RED + f"Quote cache Redis write failed: {e}")
+
+    async def get_many(self, symbols: list[str]) -> dict[str, Quote]:
+        """Cached quotes (fresh or not) for `symbols`, in one Redis round trip for local misses."""
+        now = time.time()
+        found: dict[str, Quote] = {}
+        remote = []
+        for symbol in symbols:
+            quote = self._entries.get(symbol)
+            if self.fresh(quote, now):
+                self.hits += 1
+                found[symbol] = quote
+            else:
+                if quote is not None:
+                    found[symbol] = quote
+                remote.append(symbol)
+
+        if remote and self.use_redis:
+            try:
+                values = await self._client().mget([self._key(s) for s in remote])
+            except Exception as e:
+                print(Fore.RED + f"Quote cache Redis read failed: {e}")
+                values = [None] * len(remote)
+            for symbol, raw in zip(remote, values):
+                if not raw:
+                    continue
+                quote = Quote(*json.loads(raw))
+                if symbol not in found or found[symbol].ts < quote.ts:
+                    found[symbol] = quote
+                    self._store_local(symbol, quote)
+                if self.fresh(quote, now):
+                    self.redis_hits += 1
+        return found
+
+    async def get_or_fetch(self, symbols: list[str], fetch) -> dict[str, tuple[Quote, bool]]:
+        """
+        {symbol: (quote, stale)} for `symbols`. `fetch(list) -> {symbol: price}`
+        is called once for the stale symbols nobody else is fetching; symbols
+        it can't price fall back to their last known quote, marked stale.
+        """
+        cached = await self.get_many(symbols)
+        now = time.time()
+        stale = [s for s in symbols if not self.fresh(cached.get(s), now)]
+
+        waiting: dict[str, asyncio.Future] = {}
+        to_fetch = []
+        for symbol in stale:
+            inflight = self._inflight.get(symbol)
+            if inflight is not None:
+                self.coalesced += 1
+                waiting[symbol] = inflight
+            else:
+                to_fetch.append(symbol)
+
+        if to_fetch:
+            self.misses += len(to_fetch)
+            # one upstream batch, run as its own task so a disconnecting
+            # client doesn't cancel it for others waiting on the same symbols
+            batch = asyncio.create_task(self._fetch(to_fetch, fetch))
+            self._fetches.add(batch)
+            batch.add_done_callback(self._fetches.discard)
+            for symbol in to_fetch:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[symbol] = future
+                waiting[symbol] = future
+            batch.add_done_callback(lambda task, symbols=to_fetch: self._settle(symbols, task))
+
+        result = {s: (q, False) for s, q in cached.items() if s not in waiting}
+        for symbol, future in waiting.items():
+            quote = await asyncio.shield(future)
+            if quote is None:
+                quote = cached.get(symbol)
+                if quote is None:
+                    continue
+                self.stale_served += 1
+                result[symbol] = (quote, True)
+            else:
+                result[symbol] = (quote, False)
+        return result
+
+    async def _fetch(self, symbols: list[str], fetch) -> dict[str, Quote]:
+        self.upstream_symbols += len(symbols)
+        prices = await fetch(symbols)
+        ts = time.time()
+        await self.put_many(prices, ts)
+        return {s: Quote(p, ts) for s, p in prices.items()}
+
+    def _settle(self, symbols: list[str], task: asyncio.Task):
+        quotes = {}
+        if task.cancelled():
+            pass
+        elif task.exception() is not None:
+            print(Fore.RED + f"Quote fetch failed: {task.exception()}")
+        else:
+            quotes = task.result()
+        for symbol in symbols:
+            future = self._inflight.pop(symbol, None)
+            if future is not None and not future.done():
+                future.set_result(quotes.get(symbol))
+
+    async def aclose(self):
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def metrics(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "upstream_symbols": self.upstream_symbols,
+            "stale_served": self.stale_served,
+        }
+
+
+quote_cache = QuoteCache(
+    ttl=settings.QUOTE_CACHE_TTL_SECONDS,
+    retain=settings.QUOTE_CACHE_RETAIN_SECONDS,
+    max_size=settings.QUOTE_CACHE_MAX_SIZE,
+    use_redis=settings.QUOTE_CACHE_REDIS,
+)
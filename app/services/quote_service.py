@@ -0,0 +1,166 @@
+import asyncio
+import random
+import time
+import httpx
+from colorama import Fore
+from app.core.config import settings
+
+
+class TokenBucket:
+    """
+    Async token bucket sized to the quote provider's quota.
+    `rate` tokens are added per second, up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: float | None = None) -> bool:
+        """Wait for one token. Returns False if it cannot be had before `deadline`."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+
+                wait = (1 - self._tokens) / self.rate
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    return False
+                await asyncio.sleep(wait)
+
+
+class QuoteFetcher:
+    """
+    Fetch latest prices for many symbols concurrently.
+
+    - at most `concurrency` requests in flight
+    - requests paced by a token bucket (`rate_per_second`, `burst`)
+    - 429 / 5xx / network errors retried with exponential backoff
+    - the whole run is bounded by `deadline` seconds; symbols not
+      quoted in time are left out of the result
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        concurrency: int | None = None,
+        rate_per_second: float | None = None,
+        burst: int | None = None,
+        max_retries: int | None = None,
+        backoff_base: float = 0.5,
+        deadline: float | None = None,
+        request_timeout: float = 10.0,
+        bucket: TokenBucket | None = None,
+    ):
+        self.client = client
+        self.base_url = (base_url or settings.FINNHUB_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.FINNHUB_API_KEY
+        self.concurrency = concurrency or settings.QUOTE_CONCURRENCY
+        # pass a shared bucket to pace many short-lived fetchers against one quota
+        self.bucket = bucket or TokenBucket(
+            rate_per_second or settings.QUOTE_RATE_PER_SECOND,
+            burst or settings.QUOTE_BURST,
+        )
+        self.max_retries = settings.QUOTE_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.deadline = deadline or settings.QUOTE_RUN_DEADLINE_SECONDS
+        self.request_timeout = request_timeout
+
+    async def fetch_many(self, symbols) -> dict[str, float]:
+        """Return a {symbol: price} map for every symbol quoted before the deadline."""
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return {}
+
+        if self.client is not None:
+            return await self._run(self.client, symbols)
+
+        async with httpx.AsyncClient() as client:
+            return await self._run(client, symbols)
+
+    async def _run(self, client: httpx.AsyncClient, symbols: list[str]) -> dict[str, float]:
+        deadline = time.monotonic() + self.deadline
+        semaphore = asyncio.Semaphore(self.concurrency)
+        prices: dict[str, float] = {}
+
+        async def worker(symbol: str):
+            async with semaphore:
+                price = await self._fetch_one(client, symbol, deadline)
+            if price is not None:
+                prices[symbol] = price
+
+        tasks = [asyncio.create_task(worker(s)) for s in symbols]
+        _, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+
+        if pending:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            print(Fore.RED + f"Quote deadline hit: {len(pending)} of {len(symbols)} symbols not fetched")
+
+        return prices
+
+    async def _fetch_one(self, client: httpx.AsyncClient, symbol: str, deadline: float) -> float | None:
+        url = f"{self.base_url}/quote"
+        params = {"symbol": symbol, "token": self.api_key}
+
+        for attempt in range(self.max_retries + 1):
+            if not await self.bucket.acquire(deadline):
+                return None
+
+            retry_after = None
+            try:
+                res = await client.get(url, params=params, timeout=self.request_timeout)
+                if res.status_code == 429 or res.status_code >= 500:
+                    retry_after = res.headers.get("Retry-After")
+                    raise httpx.HTTPStatusError(
+                        f"status {res.status_code}", request=res.request, response=res
+                    )
+                res.raise_for_status()
+
+                current_price = res.json().get("c")
+                # Finnhub answers unknown symbols with c=0
+                if not current_price:
+                    print(Fore.RED + f"No price returned for {symbol}")
+                    return None
+                return float(current_price)
+
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                if status is not None and status != 429 and status < 500:
+                    print(Fore.RED + f"Error fetching {symbol}: {e}")
+                    return None
+                if attempt == self.max_retries:
+                    print(Fore.RED + f"Giving up on {symbol} after {attempt + 1} attempts: {e}")
+                    return None
+
+                delay = self._backoff(attempt, retry_after)
+                if time.monotonic() + delay > deadline:
+                    return None
+                await asyncio.sleep(delay)
+
+            except Exception as e:
+                print(Fore.RED + f"Error fetching {symbol}: {e}")
+                return None
+
+        return None
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
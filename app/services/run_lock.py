@@ -0,0 +1,173 @@
+import asyncio
+import json
+import time
+from colorama import Fore
+
+# take the lock and stamp it with the next fencing token, atomically
+_ACQUIRE = """
+if redis.call("exists", KEYS[1]) == 1 then
+    return 0
+end
+local fence = redis.call("incr", KEYS[2])
+redis.call("set", KEYS[1], fence, "PX", ARGV[1])
+return fence
+"""
+
+_RENEW = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# write only if no later run has taken a fencing token since ours
+_FENCED_SET = """
+if redis.call("get", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("set", KEYS[2], ARGV[2])
+return 1
+"""
+
+
+class RunLock:
+    """
+    Distributed lock for one evaluation run (per shard), with fencing tokens.
+
+    acquire() returns a token from a monotonically increasing counter, or
+    None if another run holds the lock. While held the lock is renewed every
+    ttl/3; if the holder dies it lapses after `ttl`. A run whose lock lapsed
+    (e.g. a long GC pause) can tell via still_held(), and its fenced writes
+    are rejected once a newer run has taken a token.
+    """
+
+    def __init__(self, r, name: str, ttl: float):
+        self.r = r
+        self.name = name
+        self.lock_key = f"{name}:lock"
+        self.fence_key = f"{name}:fence"
+        self.ttl_ms = int(ttl * 1000)
+        self.fence: int | None = None
+        self._renewer: asyncio.Task | None = None
+
+    async def acquire(self) -> int | None:
+        fence = int(await self.r.eval(_ACQUIRE, 2, self.lock_key, self.fence_key, self.ttl_ms))
+        if not fence:
+            return None
+        self.fence = fence
+        self._renewer = asyncio.create_task(self._renew())
+        return fence
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.ttl_ms / 3000)
+            try:
+                if not await self.r.eval(_RENEW, 1, self.lock_key, self.fence, self.ttl_ms):
+                    print(Fore.RED + f"Lost run lock {self.lock_key} (fence {self.fence})")
+                    return
+            except Exception as e:
+                print(Fore.RED + f"Run lock renewal failed for {self.lock_key}: {e}")
+
+    async def still_held(self) -> bool:
+        if self.fence is None:
+            return False
+        current = await self.r.get(self.lock_key)
+        return current is not None and int(current) == self.fence
+
+    async def fenced_set(self, key: str, value: str) -> bool:
+        """SET key only if this run's token is still the latest one issued."""
+        return bool(await self.r.eval(_FENCED_SET, 2, self.fence_key, key, self.fence, value))
+
+    async def release(self):
+        if self._renewer is not None:
+            self._renewer.cancel()
+            self._renewer = None
+        if self.fence is None:
+            return
+        try:
+            await self.r.eval(_RELEASE, 1, self.lock_key, self.fence)
+        except Exception as e:
+            print(Fore.RED + f"Run lock release failed for {self.lock_key}: {e}")
+
+
+class RunWatermark:
+    """
+    What the last completed run evaluated: per symbol, the price it saw and
+    the alerts its index held (highest id and count). A symbol can be
+    skipped when its price is unchanged and this process's index holds no
+    alert beyond that - tracked per symbol, because the writer's index may
+    be ahead of or behind the reader's on other symbols, and ids can commit
+    out of order.
+
+    `checked` is when each symbol was last quoted, so the next run can
+    quote the longest-unchecked symbols first. `schedule` carries each
+    symbol's adaptive check state between runs (see
+    check_scheduler.SymbolSchedule).
+    """
+
+    def __init__(
+        self,
+        alerts: dict[str, list[int]] | None = None,
+        prices: dict[str, float] | None = None,
+        fence: int = 0,
+        schedule: dict[str, list] | None = None,
+        checked: dict[str, float] | None = None,
+    ):
+        # symbol -> [max alert id, active alert count]
+        self.alerts = alerts or {}
+        self.prices = prices or {}
+        self.fence = fence
+        self.schedule = schedule or {}
+        self.checked = checked or {}
+
+    @staticmethod
+    def key(run_name: str) -> str:
+        return f"{run_name}:watermark"
+
+    @staticmethod
+    def alerts_of(index, symbol: str) -> list[int]:
+        return [index.max_id(symbol), index.count(symbol)]
+
+    @classmethod
+    async def load(cls, r, run_name: str) -> "RunWatermark":
+        try:
+            raw = await r.get(cls.key(run_name))
+        except Exception as e:
+            print(Fore.RED + f"Watermark read failed for {run_name}: {e}")
+            return cls()
+        if not raw:
+            return cls()
+        data = json.loads(raw)
+        return cls(data["alerts"], data["prices"], data["fence"], data["schedule"], data["checked"])
+
+    def has_new_alerts(self, symbol: str, index) -> bool:
+        seen = self.alerts.get(symbol)
+        if seen is None:
+            return True
+        max_id, count = self.alerts_of(index, symbol)
+        return max_id > seen[0] or count > seen[1]
+
+    def oldest_checked_first(self, symbols: list[str]) -> list[str]:
+        """Never-quoted symbols, then the longest unchecked: a run cut short by its deadline skips different symbols each time."""
+        return sorted(symbols, key=lambda s: self.checked.get(s, 0.0))
+
+    def unchanged(self, symbol: str, price: float, index) -> bool:
+        return self.prices.get(symbol) == price and not self.has_new_alerts(symbol, index)
+
+    async def save(self, lock: RunLock) -> bool:
+        value = json.dumps({
+            "fence": lock.fence,
+            "alerts": self.alerts,
+            "prices": self.prices,
+            "schedule": self.schedule,
+            "checked": self.checked,
+            "finished_at": time.time(),
+        })
+        return await lock.fenced_set(self.key(lock.name), value)
@@ -0,0 +1,34 @@
+import zlib
+
+
+def shard_of(symbol: str, total_shards: int) -> int:
+    """Stable shard for a symbol (crc32, so every process agrees, unlike hash())."""
+    return zlib.crc32(symbol.encode()) % total_shards
+
+
+def parse_total_shards(payload: dict, default: int = 1) -> int:
+    """total_shards from a task payload, `default` when absent; ValueError unless an int >= 1."""
+    value = payload.get("total_shards")
+    if value is None:
+        return default
+    try:
+        total = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid total_shards {value!r}")
+    if total < 1:
+        raise ValueError(f"total_shards must be at least 1, got {total}")
+    return total
+
+
+def parse_shard(payload: dict) -> tuple[int, int]:
+    """(shard, total_shards) from a task payload; (0, 1) when unsharded."""
+    total = parse_total_shards(payload)
+    shard = int(payload.get("shard") or 0)
+    if not 0 <= shard < total:
+        raise ValueError(f"invalid shard {shard}/{total}")
+    return shard, total
+
+
+def run_name(shard: int, total_shards: int) -> str:
+    """Redis key prefix for a shard's run lock, fencing counter and watermark."""
+    return f"alerts:run:{shard}/{total_shards}"
@@ -0,0 +1,303 @@
+import asyncio
+import json
+import time
+import redis.asyncio as redis
+import websockets
+from colorama import Fore
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.alert_evaluator import ensure_index_fresh, evaluate_prices
+from app.services.alert_index import alert_index
+from app.services.quote_cache import quote_cache
+from app.services.sharding import shard_of
+
+
+def parse_trades(message: dict) -> list[tuple[str, float]]:
+    """(symbol, price) pairs from a Finnhub `trade` message; [] for ping/error/other."""
+    if message.get("type") != "trade":
+        return []
+    return [(t["s"], float(t["p"])) for t in message.get("data") or [] if "s" in t and "p" in t]
+
+
+class FinnhubTradeFeed:
+    """
+    Finnhub's streaming trade feed (wss://ws.finnhub.io).
+
+    Subscriptions are sent as {"type": "subscribe", "symbol": ...} and
+    replayed after every reconnect; at most `max_symbols` are kept (the
+    free tier allows 50 per connection), taken from the front of the
+    priority-ordered list given to set_symbols().
+    """
+
+    def __init__(self, url: str, token: str | None, max_symbols: int):
+        self.url = url
+        self.token = token
+        self.max_symbols = max_symbols
+        self.subscribed: set[str] = set()
+        self.connected = False
+        self.reconnects = 0
+        self._ws = None
+
+    async def set_symbols(self, symbols: list[str]):
+        target = set(symbols[:self.max_symbols])
+        added, removed = target - self.subscribed, self.subscribed - target
+        self.subscribed = target
+        if self._ws is None:
+            return
+        try:
+            for symbol in removed:
+                await self._ws.send(json.dumps({"type": "unsubscribe", "symbol": symbol}))
+            for symbol in added:
+                await self._ws.send(json.dumps({"type": "subscribe", "symbol": symbol}))
+        except Exception as e:
+            # the reconnect in messages() resubscribes everything
+            print(Fore.RED + f"Trade feed subscription update failed: {e}")
+
+    async def messages(self):
+        """Decoded feed messages, forever, reconnecting with backoff."""
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(f"{self.url}?token={self.token}", ping_interval=20) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    backoff = 1.0
+                    for symbol in self.subscribed:
+                        await ws.send(json.dumps({"type": "subscribe", "symbol": symbol}))
+                    print(Fore.GREEN + f"Trade feed connected ({len(self.subscribed)} symbols)")
+                    async for raw in ws:
+                        yield json.loads(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(Fore.RED + f"Trade feed disconnected: {e}")
+            finally:
+                self._ws = None
+                self.connected = False
+
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+class ReplayTradeFeed:
+    """
+    Local stand-in for FinnhubTradeFeed: replays Finnhub-format messages
+    from a JSONL file (or a list), paced by their trade timestamps divided by
+    `speed` (0 = as fast as possible). Like the real feed, only trades for
+    subscribed symbols are delivered. messages() ends with the input.
+    """
+
+    def __init__(self, path: str | None = None, messages: list[dict] | None = None, speed: float = 1.0):
+        self.path = path
+        self._messages = messages
+        self.speed = speed
+        self.subscribed: set[str] = set()
+        self.connected = False
+        self.reconnects = 0
+
+    async def set_symbols(self, symbols: list[str]):
+        self.subscribed = set(symbols)
+
+    def _source(self):
+        if self._messages is not None:
+            yield from self._messages
+            return
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    async def messages(self):
+        self.connected = True
+        first_ts = started = None
+        try:
+            for message in self._source():
+                data = [t for t in message.get("data") or [] if t.get("s") in self.subscribed]
+                if message.get("type") == "trade":
+                    if not data:
+                        continue
+                    message = {**message, "data": data}
+                    ts = max(t.get("t", 0) for t in data) / 1000
+                    if self.speed and ts:
+                        if first_ts is None:
+                            first_ts, started = ts, time.monotonic()
+                        delay = (ts - first_ts) / self.speed - (time.monotonic() - started)
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                yield message
+                # let the flusher run between messages when replaying flat out
+                await asyncio.sleep(0)
+        finally:
+            self.connected = False
+
+
+class PriceIngestor:
+    """
+    Push-based evaluation from a trade feed.
+
+    - subscribes to exactly the symbols with active alerts (re-synced every
+      `resync_interval` seconds)
+    - ticks are coalesced per symbol: only the latest price is kept
+    - every `flush_interval` seconds the symbols whose price moved since
+      they were last evaluated are handed to `evaluate(prices)`
+    """
+
+    def __init__(self, feed, evaluate, active_symbols, flush_interval: float, resync_interval: float, on_stop=None):
+        self.feed = feed
+        self.evaluate = evaluate
+        self.active_symbols = active_symbols
+        self.flush_interval = flush_interval
+        self.resync_interval = resync_interval
+        self.on_stop = on_stop
+        self.latest: dict[str, float] = {}
+        self.evaluated: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+        # metrics
+        self.ticks = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.symbols_evaluated = 0
+        self.triggered = 0
+        self.last_tick_at: float | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.on_stop is not None:
+            await self.on_stop()
+
+    async def run(self):
+        await self.sync_symbols()
+        background = [
+            asyncio.create_task(self._every(self.flush_interval, self.flush)),
+            asyncio.create_task(self._every(self.resync_interval, self.sync_symbols)),
+        ]
+        try:
+            async for message in self.feed.messages():
+                self.on_message(message)
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+        # evaluate whatever the last ticks left pending
+        await self.flush()
+
+    async def _every(self, interval: float, fn):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await fn()
+            except Exception as e:
+                print(Fore.RED + f"Trade feed {fn.__name__} failed: {e}")
+
+    def on_message(self, message: dict):
+        for symbol, price in parse_trades(message):
+            self.ticks += 1
+            if symbol in self.latest:
+                self.coalesced += 1
+            self.latest[symbol] = price
+            self.last_tick_at = time.time()
+
+    async def sync_symbols(self):
+        ranked = await self.active_symbols()
+        await self.feed.set_symbols(ranked)
+        symbols = set(ranked)
+        # forget prices of symbols that no longer have alerts
+        self.evaluated = {s: p for s, p in self.evaluated.items() if s in symbols}
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.latest:
+                return
+            pending, self.latest = self.latest, {}
+            # ticks still in flight for just-unsubscribed symbols are dropped
+            subscribed = self.feed.subscribed
+            moved = {s: p for s, p in pending.items() if s in subscribed and self.evaluated.get(s) != p}
+            if not moved:
+                return
+
+            self.flushes += 1
+            self.symbols_evaluated += len(moved)
+            try:
+                self.triggered += await self.evaluate(moved)
+            except Exception:
+                # retry these prices on the next flush unless a newer tick arrived
+                self.latest = {**moved, **self.latest}
+                raise
+            self.evaluated.update(moved)
+
+    def metrics(self) -> dict:
+        return {
+            "connected": self.feed.connected,
+            "reconnects": self.feed.reconnects,
+            "subscribed": len(self.feed.subscribed),
+            "ticks": self.ticks,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "symbols_evaluated": self.symbols_evaluated,
+            "triggered": self.triggered,
+            "last_tick_at": self.last_tick_at,
+        }
+
+
+def rank_symbols(symbols, prices: dict) -> list[str]:
+    """
+    Symbols most likely to trigger soon first: by the nearest active
+    target's distance relative to the last known price, then by alert
+    count. Symbols with no known price go last; whatever doesn't fit in the
+    feed's subscription limit is left to the scheduled runs.
+    """
+    def key(symbol):
+        quote = prices.get(symbol)
+        price = quote.price if quote is not None else 0.0
+        gap = alert_index.nearest_gap(symbol, price) / price if price > 0 else float("inf")
+        return gap, -alert_index.count(symbol), symbol
+
+    return sorted(symbols, key=key)
+
+
+def build_ingestor(shard: int = 0, total_shards: int = 1) -> PriceIngestor:
+    """
+    PriceIngestor wired to the alert index, Postgres and Redis from settings,
+    streaming only the symbols of `shard` so each worker watches its own.
+    """
+    if settings.TRADE_FEED_REPLAY_FILE:
+        feed = ReplayTradeFeed(settings.TRADE_FEED_REPLAY_FILE, speed=settings.TRADE_FEED_REPLAY_SPEED)
+    else:
+        feed = FinnhubTradeFeed(settings.TRADE_FEED_URL, settings.FINNHUB_API_KEY, settings.TRADE_FEED_MAX_SYMBOLS)
+
+    r = redis.from_url(settings.REDIS_URL)
+
+    async def evaluate(prices: dict[str, float]) -> int:
+        # the Redis write of the cache stays off the trigger path
+        quote_cache.put_many_soon(prices)
+        async with AsyncSessionLocal() as db:
+            return await evaluate_prices(db, r, prices)
+
+    async def active_symbols() -> list[str]:
+        try:
+            await ensure_index_fresh()
+        except Exception as e:
+            print(Fore.RED + f"Alert index refresh failed: {e}")
+        symbols = [s for s in alert_index.symbols() if shard_of(s, total_shards) == shard]
+        # last prices seen by the scheduled runs (or this feed)
+        prices = await quote_cache.get_many(symbols)
+        return rank_symbols(symbols, prices)
+
+    return PriceIngestor(
+        feed,
+        evaluate,
+        active_symbols,
+        flush_interval=settings.TRADE_FEED_FLUSH_SECONDS,
+        resync_interval=settings.TRADE_FEED_RESYNC_SECONDS,
+        on_stop=r.aclose,
+    )
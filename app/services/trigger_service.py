@@ -0,0 +1,69 @@
+from typing import NamedTuple
+from sqlalchemy import Integer, any_, bindparam, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Alert, AlertHistory, User
+from app.services.alert_index import IndexedAlert
+
+
+class TriggeredAlert(NamedTuple):
+    alert: IndexedAlert
+    price: float
+    history_id: int
+    email: str | None
+
+
+def _id_array(name: str, ids: list[int]):
+    # one array parameter (`= ANY($1::INTEGER[])`) instead of one bind per id
+    return any_(bindparam(name, ids, type_=ARRAY(Integer)))
+
+
+async def persist_triggers(
+    db: AsyncSession,
+    crossed: list[tuple[IndexedAlert, float]],
+) -> list[TriggeredAlert]:
+    """
+    Persist every alert crossed in a run in a single transaction:
+
+    1. UPDATE alerts SET is_triggered = true WHERE id = ANY(...) AND NOT is_triggered
+    2. one multi-row INSERT INTO alert_history ... RETURNING
+    3. one SELECT of the owners' emails
+
+    Only alerts flipped by step 1 get a history row and are returned, so a
+    retried run (or an alert already triggered elsewhere) is a no-op.
+    """
+    if not crossed:
+        return []
+
+    prices = {alert.id: (alert, price) for alert, price in crossed}
+
+    result = await db.execute(
+        update(Alert)
+        .where(Alert.id == _id_array("alert_ids", list(prices)), Alert.is_triggered == False)
+        .values(is_triggered=True)
+        .returning(Alert.id)
+        .execution_options(synchronize_session=False)
+    )
+    flipped = result.scalars().all()
+    if not flipped:
+        await db.rollback()
+        return []
+
+    result = await db.execute(
+        insert(AlertHistory).returning(AlertHistory.id, AlertHistory.alert_id),
+        [{"alert_id": i, "triggered_price": prices[i][1]} for i in flipped],
+    )
+    history_ids = {alert_id: history_id for history_id, alert_id in result.all()}
+
+    user_ids = list({prices[i][0].user_id for i in flipped})
+    result = await db.execute(
+        select(User.id, User.email).where(User.id == _id_array("user_ids", user_ids))
+    )
+    emails = dict(result.all())
+
+    await db.commit()
+
+    return [
+        TriggeredAlert(alert, price, history_ids[alert.id], emails.get(alert.user_id))
+        for alert, price in (prices[i] for i in flipped)
+    ]
@@ -0,0 +1,396 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import deque
+import redis.asyncio as redis
+from fastapi import WebSocket
+from colorama import Fore
+from app.core.config import settings
+from redis.exceptions import ResponseError
+from app.services.alert_events import (
+    NOTIFY_PATTERN,
+    STREAM_GROUP,
+    encode_event,
+    stream_key,
+    user_id_from_channel,
+)
+
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class SocketWriter:
+    """
+    Bounded outgoing queue for one WebSocket, drained by its own writer
+    task, so a slow client never holds up other sockets or the hub.
+    Stream entries are acknowledged only after they were actually sent;
+    dropped ones stay pending and are redelivered on the next connect.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        hub: "AlertHub",
+        user_id: int,
+        maxsize: int,
+        policy: str,
+        send_timeout: float,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown WS overflow policy: {policy}")
+        self.websocket = websocket
+        self.hub = hub
+        self.user_id = user_id
+        self.maxsize = maxsize
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.queue: deque[tuple[str, str | None]] = deque()
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def offer(self, message: str, entry_id: str | None = None) -> bool:
+        """Queue a message without waiting. Returns False if the socket is (being) closed."""
+        if self.closed:
+            return False
+
+        if len(self.queue) >= self.maxsize:
+            if self.policy == "disconnect":
+                self.hub.slow_disconnects += 1
+                self.hub.dropped += len(self.queue) + 1
+                self.queue.clear()
+                self.closed = True
+                self.hub.spawn(self._close_websocket(1013))
+                return False
+            if self.policy == "coalesce" and self._coalesce(message, entry_id):
+                self.hub.coalesced += 1
+                return True
+            self.queue.popleft()
+            self.hub.dropped += 1
+
+        self.queue.append((message, entry_id))
+        self._ready.set()
+        return True
+
+    def _coalesce(self, message: str, entry_id: str | None) -> bool:
+        """Replace queued events for the same symbol with the newer one."""
+        key = _coalesce_key(message)
+        if key is None:
+            return False
+        kept = deque(item for item in self.queue if _coalesce_key(item[0]) != key)
+        if len(kept) == len(self.queue):
+            return False
+        self.queue = kept
+        self.queue.append((message, entry_id))
+        self._ready.set()
+        return True
+
+    async def _run(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                message, entry_id = self.queue.popleft()
+                await asyncio.wait_for(self.websocket.send_text(message), self.send_timeout)
+                if entry_id is not None:
+                    await self.hub.ack(self.user_id, entry_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(Fore.RED + f"Failed to send WS message: {e}")
+            self.hub.dropped += len(self.queue) + 1
+            self.queue.clear()
+            self.closed = True
+            await self._close_websocket(1011)
+
+    async def _close_websocket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def stop(self):
+        self.closed = True
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def _coalesce_key(message: str):
+    try:
+        return json.loads(message).get("symbol")
+    except (ValueError, AttributeError):
+        return None
+
+
+class AlertHub:
+    """
+    One Redis subscription per worker process, fanned out to every local
+    WebSocket. Redis connections scale with workers, not with sockets.
+
+    Events are read from each user's stream through the shared consumer
+    group (one consumer per process) and acknowledged once sent, giving
+    at-least-once delivery.
+    """
+
+    def __init__(self):
+        self.connections: dict[int, list[SocketWriter]] = {}
+        self.redis = None
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._groups: set[int] = set()
+        self._recover: set[int] = set()
+        self._listener: asyncio.Task | None = None
+        self._draining: set[int] = set()
+        self._dirty: set[int] = set()
+        # fire-and-forget tasks (drains, socket closes), held so they aren't GC'd mid-run
+        self._tasks: set[asyncio.Task] = set()
+
+        # metrics
+        self.delivered = 0
+        self.dropped = 0
+        self.acked = 0
+        self.reclaimed = 0
+        self.coalesced = 0
+        self.slow_disconnects = 0
+        self.fanout_count = 0
+        self.fanout_total_ms = 0.0
+        self.fanout_max_ms = 0.0
+
+    # ---------------- lifecycle ----------------
+    async def start(self):
+        self.redis = redis.from_url(settings.REDIS_URL)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Run `coro` in the background, keeping a reference and logging its failure."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(Fore.RED + f"WS hub background task failed: {task.exception()}")
+
+    async def _listen(self):
+        backoff = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(NOTIFY_PATTERN)
+                print(Fore.GREEN + f"WS hub subscribed to {NOTIFY_PATTERN}")
+                backoff = 1.0
+                # anything added while we were not subscribed
+                for user_id in list(self.connections):
+                    self.schedule_drain(user_id, recover=True)
+
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    user_id = user_id_from_channel(message["channel"])
+                    if user_id in self.connections:
+                        self.schedule_drain(user_id, message["data"])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(Fore.RED + f"WS hub subscription lost: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    # ---------------- sockets ----------------
+    def register(self, user_id: int, websocket: WebSocket) -> SocketWriter:
+        writer = SocketWriter(
+            websocket,
+            self,
+            user_id,
+            maxsize=settings.WS_SEND_QUEUE_SIZE,
+            policy=settings.WS_OVERFLOW_POLICY,
+            send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+        )
+        self.connections.setdefault(user_id, []).append(writer)
+        return writer
+
+    async def unregister(self, user_id: int, writer: SocketWriter):
+        writers = self.connections.get(user_id, [])
+        if writer in writers:
+            writers.remove(writer)
+        if not writers:
+            self.connections.pop(user_id, None)
+        await writer.stop()
+
+    async def send_to_user(self, user_id: int, message: str, entry_id: str | None = None) -> int:
+        """Queue message on every WebSocket of the user without waiting on any of them. Returns sockets reached."""
+        sent = 0
+        for writer in list(self.connections.get(user_id, [])):
+            if writer.offer(message, entry_id):
+                sent += 1
+        return sent
+
+    async def replay(self, writer: SocketWriter, user_id: int, last_id: str):
+        """Resume a reconnecting client: resend every retained entry after `last_id`."""
+        entries = await self.redis.xrange(
+            stream_key(user_id), min=f"({last_id}", max="+", count=settings.ALERT_STREAM_MAXLEN
+        )
+        for entry_id, fields in entries:
+            writer.offer(encode_event(entry_id, fields), entry_id.decode())
+
+    # ---------------- delivery ----------------
+    def schedule_drain(self, user_id: int, published_at=None, recover: bool = False):
+        """
+        Deliver new stream entries to the user's sockets; at most one drain
+        per user runs at a time. `recover` also redelivers unacknowledged entries.
+        """
+        if published_at is not None:
+            self._record_latency(published_at)
+        if recover:
+            self._recover.add(user_id)
+
+        if user_id in self._draining:
+            self._dirty.add(user_id)
+            return
+        self._draining.add(user_id)
+        self.spawn(self._drain(user_id))
+
+    async def _drain(self, user_id: int):
+        try:
+            while True:
+                self._dirty.discard(user_id)
+                if user_id in self._recover:
+                    self._recover.discard(user_id)
+                    await self._deliver_unacked(user_id)
+                await self._deliver_new(user_id)
+                if user_id not in self._dirty:
+                    return
+        except Exception as e:
+            print(Fore.RED + f"WS delivery failed for user={user_id}: {e}")
+        finally:
+            self._draining.discard(user_id)
+
+    async def _ensure_group(self, user_id: int):
+        if user_id in self._groups:
+            return
+        try:
+            # start at 0 so events added while the user was offline are delivered
+            await self.redis.xgroup_create(stream_key(user_id), STREAM_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add(user_id)
+
+    async def _deliver_new(self, user_id: int):
+        """Read entries never delivered to the group and queue them on the user's sockets."""
+        await self._ensure_group(user_id)
+        key = stream_key(user_id)
+        while user_id in self.connections:
+            resp = await self.redis.xreadgroup(STREAM_GROUP, self.consumer, {key: ">"}, count=100)
+            if not resp or not resp[0][1]:
+                return
+            if not await self._fan_out(user_id, resp[0][1]):
+                return
+
+    async def _deliver_unacked(self, user_id: int):
+        """Redeliver entries read earlier but never acknowledged (ours, then idle ones of dead consumers)."""
+        await self._ensure_group(user_id)
+        key = stream_key(user_id)
+
+        last_id = "0"
+        while user_id in self.connections:
+            resp = await self.redis.xreadgroup(STREAM_GROUP, self.consumer, {key: last_id}, count=100)
+            entries = resp[0][1] if resp else []
+            if not entries:
+                break
+            last_id = entries[-1][0]
+            # entries trimmed by MAXLEN come back without fields; nothing to send, drop them from the PEL
+            trimmed = [entry_id for entry_id, fields in entries if not fields]
+            if trimmed:
+                await self.redis.xack(key, STREAM_GROUP, *trimmed)
+            entries = [e for e in entries if e[1]]
+            if entries and not await self._fan_out(user_id, entries):
+                return
+
+        start = "0-0"
+        while user_id in self.connections:
+            resp = await self.redis.xautoclaim(
+                key,
+                STREAM_GROUP,
+                self.consumer,
+                min_idle_time=settings.ALERT_STREAM_CLAIM_IDLE_MS,
+                start_id=start,
+                count=100,
+            )
+            start, entries = resp[0], resp[1]
+            trimmed = [e[0] for e in entries if e and not e[1]]
+            if trimmed:
+                await self.redis.xack(key, STREAM_GROUP, *trimmed)
+            entries = [e for e in entries if e and e[1]]
+            self.reclaimed += len(entries)
+            if entries and not await self._fan_out(user_id, entries):
+                return
+            if start in (b"0-0", "0-0"):
+                return
+
+    async def _fan_out(self, user_id: int, entries) -> bool:
+        """Queue stream entries on the user's sockets; False once no local socket is left."""
+        for entry_id, fields in entries:
+            message = encode_event(entry_id, fields)
+            if not await self.send_to_user(user_id, message, entry_id.decode()):
+                # left pending in the group; redelivered on the next connect
+                return False
+            self.delivered += 1
+        return True
+
+    async def ack(self, user_id: int, entry_id: str):
+        try:
+            self.acked += await self.redis.xack(stream_key(user_id), STREAM_GROUP, entry_id)
+        except Exception as e:
+            print(Fore.RED + f"XACK failed for user={user_id}: {e}")
+
+    def _record_latency(self, published_at):
+        try:
+            ms = (time.time() - float(published_at)) * 1000
+        except (TypeError, ValueError):
+            return
+        self.fanout_count += 1
+        self.fanout_total_ms += ms
+        self.fanout_max_ms = max(self.fanout_max_ms, ms)
+
+    def metrics(self) -> dict:
+        return {
+            "connected_users": len(self.connections),
+            "connected_sockets": sum(len(s) for s in self.connections.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "acked": self.acked,
+            "reclaimed": self.reclaimed,
+            "coalesced": self.coalesced,
+            "slow_disconnects": self.slow_disconnects,
+            "queued": sum(len(w.queue) for ws in self.connections.values() for w in ws),
+            "fanout_latency_ms": {
+                "avg": round(self.fanout_total_ms / self.fanout_count, 2) if self.fanout_count else None,
+                "max": round(self.fanout_max_ms, 2),
+            },
+        }
+
+
+hub = AlertHub()
@@ -0,0 +1,200 @@
+"""
+Standalone alert evaluator, run outside the web process:
+
+    python -m app.worker
+
+- a scheduled evaluation run every WORKER_TICK_SECONDS over the shard
+  WORKER_SHARD of WORKER_TOTAL_SHARDS (same run lock as /tasks/process, so
+  the two never overlap on a shard)
+- the streaming trade-feed ingestor over the same shard when TRADE_FEED_ENABLED
+- the alert index kept in step with the API through Redis
+- GET /health and GET /metrics on WORKER_PORT
+
+SIGTERM / SIGINT let the current run finish (up to WORKER_SHUTDOWN_SECONDS),
+drain the email queue and exit.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+import redis.asyncio as redis
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from colorama import Fore, init
+from app.core.config import settings
+from app.core.http_client import HTTPClientPool
+from app.db.session import AsyncSessionLocal
+from app.services.alert_evaluator import ensure_index_fresh, run_shard
+from app.services.alert_index import alert_index
+from app.services.email_dispatch import email_dispatcher
+from app.services.index_sync import IndexSync
+from app.services.quote_cache import quote_cache
+from app.services.trade_feed import build_ingestor
+
+init(autoreset=True)
+
+
+class AlertWorker:
+    def __init__(self, tick_interval: float, shard: int, total_shards: int):
+        self.tick_interval = tick_interval
+        self.shard = shard
+        self.total_shards = total_shards
+        self.http: HTTPClientPool | None = None
+        self.redis = None
+        self.index_sync = IndexSync()
+        self.ingestor = None
+        self._scheduler: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+        # metrics
+        self.started_at = time.time()
+        self.runs = 0
+        self.failures = 0
+        self.triggered = 0
+        self.last_run_at: float | None = None
+        self.last_success_at: float | None = None
+        self.last_duration: float | None = None
+        self.last_result: dict | None = None
+        self.last_error: str | None = None
+
+    async def start(self):
+        self.http = HTTPClientPool()
+        self.redis = redis.from_url(settings.REDIS_URL)
+        # subscribe before the warm-up; changes arriving while it streams are
+        # journaled by the index and replayed onto the rebuilt one
+        await self.index_sync.start()
+
+        try:
+            await ensure_index_fresh()
+            print(Fore.GREEN + f"Alert index loaded ({len(alert_index)} active alerts)")
+        except Exception as e:
+            print(Fore.RED + f"Alert index warm-up failed: {e}")
+
+        email_dispatcher.start(self.http.client_for(settings.SENDGRID_API_URL))
+
+        if settings.TRADE_FEED_ENABLED:
+            self.ingestor = build_ingestor(self.shard, self.total_shards)
+            self.ingestor.start()
+
+        self._scheduler = asyncio.create_task(self._schedule())
+        print(
+            Fore.GREEN + f"Alert worker started: shard {self.shard}/{self.total_shards}, "
+            f"every {self.tick_interval:g}s, trade feed {'on' if self.ingestor else 'off'}"
+        )
+
+    async def stop(self, timeout: float):
+        self._stopping.set()
+        if self._scheduler is not None:
+            # let an in-progress run finish its writes
+            try:
+                await asyncio.wait_for(self._scheduler, timeout)
+            except asyncio.TimeoutError:
+                print(Fore.RED + "Evaluation run did not finish in time, cancelling")
+            self._scheduler = None
+
+        if self.ingestor is not None:
+            await self.ingestor.stop()
+        await self.index_sync.stop()
+        await email_dispatcher.stop(settings.EMAIL_DRAIN_SECONDS)
+        await quote_cache.aclose()
+        await self.http.aclose()
+        await self.redis.aclose()
+        print(Fore.YELLOW + "Alert worker stopped")
+
+    async def _schedule(self):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        while not self._stopping.is_set():
+            await self.tick()
+            # fixed cadence; ticks missed during a long run are skipped, not queued
+            next_run = max(next_run + self.tick_interval, loop.time())
+            try:
+                await asyncio.wait_for(self._stopping.wait(), next_run - loop.time())
+            except asyncio.TimeoutError:
+                pass
+
+    async def tick(self):
+        self.runs += 1
+        self.last_run_at = time.time()
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await run_shard(db, self.http, self.redis, self.shard, self.total_shards)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(Fore.RED + f"Evaluation run failed: {e}")
+            return
+        finally:
+            self.last_duration = time.perf_counter() - started
+
+        self.last_result = result
+        self.last_success_at = time.time()
+        self.triggered += result.get("triggered", 0)
+
+    def healthy(self) -> bool:
+        # unhealthy once three ticks in a row have gone by without a good run
+        since = self.last_success_at or self.started_at
+        return time.time() - since < 3 * self.tick_interval + settings.QUOTE_RUN_DEADLINE_SECONDS
+
+    def metrics(self) -> dict:
+        return {
+            "shard": self.shard,
+            "total_shards": self.total_shards,
+            "tick_seconds": self.tick_interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "triggered": self.triggered,
+            "last_run_at": self.last_run_at,
+            "last_success_at": self.last_success_at,
+            "last_duration": self.last_duration,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+            "active_alerts": len(alert_index),
+            "index_sync": self.index_sync.metrics(),
+            "email": email_dispatcher.metrics(),
+            "quote_cache": quote_cache.metrics(),
+            "trade_feed": self.ingestor.metrics() if self.ingestor else None,
+        }
+
+
+worker = AlertWorker(
+    tick_interval=settings.WORKER_TICK_SECONDS,
+    shard=settings.WORKER_SHARD,
+    total_shards=settings.WORKER_TOTAL_SHARDS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await worker.start()
+    try:
+        yield
+    finally:
+        await worker.stop(settings.WORKER_SHUTDOWN_SECONDS)
+
+
+app = FastAPI(title="Stock Alert Worker", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    healthy = worker.healthy()
+    return JSONResponse(
+        {"status": "ok" if healthy else "stale", "last_success_at": worker.last_success_at},
+        status_code=200 if healthy else 503,
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    return worker.metrics()
+
+
+def main():
+    # uvicorn turns SIGTERM / SIGINT into the lifespan shutdown above
+    uvicorn.run(app, host="0.0.0.0", port=settings.WORKER_PORT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: alert evaluation with AlertIndex vs a linear scan.
+
+    python -m scripts.bench_alert_index [n_alerts] [n_symbols]
+
+Defaults to 1,000,000 alerts spread over 5,000 symbols.
+"""
+import random
+import sys
+import time
+from app.db.models import DirectionEnum
+from app.services.alert_index import AlertIndex, IndexedAlert
+
+
+def make_alerts(n: int, n_symbols: int):
+    """ABOVE targets sit up to 20% over the last price, BELOW targets up to 20% under it."""
+    rng = random.Random(42)
+    base = {f"SYM{i}": rng.uniform(10, 500) for i in range(n_symbols)}
+    symbols = list(base)
+
+    alerts = []
+    for i in range(1, n + 1):
+        symbol = rng.choice(symbols)
+        direction = rng.choice((DirectionEnum.ABOVE, DirectionEnum.BELOW))
+        move = rng.uniform(0, 0.2)
+        target = base[symbol] * (1 + move if direction == DirectionEnum.ABOVE else 1 - move)
+        alerts.append(IndexedAlert(i, rng.randint(1, 100_000), symbol, round(target, 2), direction))
+    return alerts, base
+
+
+def linear_scan(alerts, prices):
+    crossed = []
+    for a in alerts:
+        price = prices.get(a.symbol)
+        if price is None:
+            continue
+        if (a.direction == DirectionEnum.ABOVE and price > a.target_price) or (
+            a.direction == DirectionEnum.BELOW and price < a.target_price
+        ):
+            crossed.append(a)
+    return crossed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+    alerts, base = make_alerts(n, n_symbols)
+    symbols = list(base)
+    rng = random.Random(7)
+    # a typical tick: every symbol moves by ~1%
+    prices = {s: p * (1 + rng.gauss(0, 0.01)) for s, p in base.items()}
+
+    index = AlertIndex()
+    t = time.perf_counter()
+    index.load(alerts)
+    load_s = time.perf_counter() - t
+
+    t = time.perf_counter()
+    crossed_index = [a for s, p in prices.items() for a in index.crossed(s, p)]
+    index_s = time.perf_counter() - t
+
+    t = time.perf_counter()
+    crossed_scan = linear_scan(alerts, prices)
+    scan_s = time.perf_counter() - t
+
+    assert {a.id for a in crossed_index} == {a.id for a in crossed_scan}
+
+    one = symbols[0]
+    t = time.perf_counter()
+    for _ in range(10_000):
+        index.crossed(one, prices[one])
+    single_us = (time.perf_counter() - t) / 10_000 * 1e6
+
+    print(f"alerts={n:,} symbols={n_symbols:,} crossed={len(crossed_index):,}")
+    print(f"index load:          {load_s * 1000:9.1f} ms")
+    print(f"index evaluation:    {index_s * 1000:9.1f} ms")
+    print(f"linear scan:         {scan_s * 1000:9.1f} ms")
+    print(f"single-symbol check: {single_us:9.1f} µs ({index.count(one):,} alerts on {one})")
+
+
+if __name__ == "__main__":
+    main()
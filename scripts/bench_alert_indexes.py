@@ -0,0 +1,130 @@
+"""
+Benchmark: query plans for the alert queries before and after the
+active-alert indexes.
+
+    python -m scripts.bench_alert_indexes [n_rows] [active_percent]
+
+Builds a scratch copy of the alerts table in its own schema on DATABASE_URL
+(default 10,000,000 rows, 100 alerts per user over 5,000 symbols, 5% active),
+prints EXPLAIN (ANALYZE, BUFFERS) and the median of 5 runs for each query with
+only the original indexes, then again with the indexes from migration
+c3e9415c3a3a. The schema is dropped afterwards.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from sqlalchemy import text
+from app.db.session import engine
+
+SCHEMA = "bench_alert_indexes"
+TABLE = f"{SCHEMA}.alerts"
+ALERTS_PER_USER = 100
+N_SYMBOLS = 5000
+
+# what the app runs: index rebuild, per-symbol lookup, duplicate check, alert list
+QUERIES = {
+    "active scan": f"SELECT id, user_id, symbol, target_price, direction FROM {TABLE} WHERE is_triggered = false",
+    "active by symbol": f"SELECT id, user_id, target_price, direction FROM {TABLE} WHERE is_triggered = false AND symbol = 'S42'",
+    "duplicate check": f"SELECT id FROM {TABLE} WHERE user_id = 4242 AND symbol = 'S7' AND is_triggered = false",
+    "user alert list": f"SELECT * FROM {TABLE} WHERE user_id = 4242 ORDER BY id DESC",
+}
+
+ORIGINAL_INDEXES = [
+    f"CREATE INDEX ix_bench_alerts_symbol ON {TABLE} (symbol)",
+]
+
+NEW_INDEXES = [
+    f"CREATE INDEX ix_bench_alerts_active_symbol ON {TABLE} (symbol) WHERE NOT is_triggered",
+    f"CREATE UNIQUE INDEX uq_bench_alerts_active_user_symbol ON {TABLE} (user_id, symbol) WHERE NOT is_triggered",
+    f"CREATE INDEX ix_bench_alerts_user_id_id_desc ON {TABLE} (user_id, id DESC)",
+]
+
+
+async def seed(conn, n_rows: int, active_percent: int):
+    # row i belongs to user i % n_users and gets that user's (i / n_users)-th
+    # symbol, so (user_id, symbol) is unique and the unique index can build
+    n_users = max(1, n_rows // ALERTS_PER_USER)
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(
+        text(
+            f"""
+            CREATE TABLE {TABLE} (
+                id integer PRIMARY KEY,
+                user_id integer NOT NULL,
+                symbol varchar(50) NOT NULL,
+                target_price double precision NOT NULL,
+                direction varchar(5) NOT NULL,
+                is_triggered boolean DEFAULT false,
+                created_at timestamptz DEFAULT now()
+            )
+            """
+        )
+    )
+    started = time.perf_counter()
+    await conn.execute(
+        text(
+            f"""
+            INSERT INTO {TABLE} (id, user_id, symbol, target_price, direction, is_triggered)
+            SELECT i,
+                   i % :n_users,
+                   'S' || ((i / :n_users) % {N_SYMBOLS}),
+                   round((10 + random() * 490)::numeric, 2),
+                   CASE WHEN i % 2 = 0 THEN 'above' ELSE 'below' END,
+                   random() * 100 >= :active_percent
+            FROM generate_series(1, :n_rows) AS i
+            """
+        ),
+        {"n_users": n_users, "n_rows": n_rows, "active_percent": float(active_percent)},
+    )
+    print(f"seeded {n_rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+
+async def build_indexes(conn, statements: list[str]):
+    started = time.perf_counter()
+    for stmt in statements:
+        await conn.execute(text(stmt))
+    await conn.execute(text(f"VACUUM ANALYZE {TABLE}"))
+    print(f"built {len(statements)} index(es) in {time.perf_counter() - started:.1f}s")
+
+
+async def report(conn, label: str):
+    print(f"\n===== {label} =====")
+    for name, sql in QUERIES.items():
+        plan = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            await conn.execute(text(sql))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        print(f"\n--- {name}: median {statistics.median(timings):.1f} ms ---")
+        for (line,) in plan:
+            print(line)
+
+
+async def run(n_rows: int, active_percent: int):
+    # autocommit so VACUUM is allowed and each step is visible to the next
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            await seed(conn, n_rows, active_percent)
+            await build_indexes(conn, ORIGINAL_INDEXES)
+            await report(conn, "original indexes")
+            await build_indexes(conn, NEW_INDEXES)
+            await report(conn, "with active-alert indexes")
+        finally:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    active_percent = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{n_rows:,} alerts, {active_percent}% active")
+    asyncio.run(run(n_rows, active_percent))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: GET /alerts/ as ORM entities vs projected rows.
+
+    python -m scripts.bench_alert_list [alerts_per_user]
+
+Creates the app tables in a scratch schema on DATABASE_URL, seeds one user
+with 10,000 alerts (default) over 500 symbols, only the newest per symbol
+still active, and reports the median of 10 runs and the body size for:
+
+- orm, all:        the old path, select(Alert) -> AlertOut -> JSON
+- rows, all:       alert_page() with no limit
+- rows, page:      first keyset page of ALERTS_PAGE_SIZE
+- rows, deep page: a page from the oldest end, via cursor
+- rows, filtered:  active alerts for one symbol
+
+The schema is dropped afterwards.
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.fast_json import dumps
+from app.db.base import Base
+from app.db.models import Alert
+from app.db.schemas import AlertOut
+from app.db.session import engine
+from app.routers.alerts import alert_page
+
+SCHEMA = "bench_alert_list"
+USER_ID = 1
+N_SYMBOLS = 500
+RUNS = 10
+
+
+async def seed(conn, n_alerts: int):
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.run_sync(Base.metadata.create_all)
+    await conn.execute(
+        text(f"INSERT INTO {SCHEMA}.users (id, email, password_hash) VALUES (:id, 'bench@example.com', 'x')"),
+        {"id": USER_ID},
+    )
+    # the newest alert per symbol stays active, so the partial unique index holds
+    await conn.execute(
+        text(
+            f"""
+            INSERT INTO {SCHEMA}.alerts (id, user_id, symbol, target_price, direction, is_triggered, created_at)
+            SELECT i,
+                   :user_id,
+                   'S' || (i % {N_SYMBOLS}),
+                   round((10 + random() * 490)::numeric, 2),
+                   CASE WHEN i % 2 = 0 THEN 'ABOVE' ELSE 'BELOW' END::{SCHEMA}.directionenum,
+                   i <= :n - {N_SYMBOLS},
+                   now() - (:n - i) * interval '1 minute'
+            FROM generate_series(1, :n) AS i
+            """
+        ),
+        {"user_id": USER_ID, "n": n_alerts},
+    )
+    await conn.execute(text(f"ANALYZE {SCHEMA}.alerts"))
+
+
+async def orm_all(db) -> bytes:
+    result = await db.execute(
+        select(Alert).where(Alert.user_id == USER_ID).order_by(Alert.id.desc())
+    )
+    alerts = result.scalars().all()
+    # what FastAPI does with response_model=List[AlertOut]
+    out = [
+        AlertOut.model_validate({c: getattr(a, c) for c in AlertOut.model_fields}).model_dump(mode="json")
+        for a in alerts
+    ]
+    return json.dumps(out).encode()
+
+
+async def rows(db, **kwargs) -> bytes:
+    alerts, _ = await alert_page(db, USER_ID, **kwargs)
+    return dumps(alerts)
+
+
+async def measure(session_factory, fn) -> tuple[float, int]:
+    timings = []
+    size = 0
+    for _ in range(RUNS):
+        # a fresh session per run, like a request
+        async with session_factory() as db:
+            started = time.perf_counter()
+            body = await fn(db)
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(body)
+    return statistics.median(timings), size
+
+
+async def run(n_alerts: int):
+    bench_engine = engine.execution_options(schema_translate_map={None: SCHEMA})
+    try:
+        async with bench_engine.begin() as conn:
+            await seed(conn, n_alerts)
+        print(f"seeded {n_alerts:,} alerts for one user")
+
+        def session_factory():
+            return AsyncSession(bench_engine, expire_on_commit=False)
+
+        page = settings.ALERTS_PAGE_SIZE
+        cases = {
+            "orm, all": orm_all,
+            "rows, all": lambda db: rows(db, limit=None),
+            f"rows, page of {page}": lambda db: rows(db, limit=page),
+            f"rows, deep page of {page}": lambda db: rows(db, limit=page, cursor=page + 1),
+            "rows, filtered": lambda db: rows(db, limit=page, symbol="S7", is_triggered=False),
+        }
+        print(f"\n{'case':<26}{'median ms':>12}{'bytes':>12}")
+        for name, fn in cases.items():
+            ms, size = await measure(session_factory, fn)
+            print(f"{name:<26}{ms:>12.2f}{size:>12,}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main():
+    n_alerts = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    asyncio.run(run(n_alerts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: alert email dispatch against a local fake SendGrid.
+
+    python -m scripts.bench_email_dispatch [n_emails] [failure_rate] [bad_addresses]
+
+Runs EmailDispatcher against `fake_sendgrid`, an in-process stand-in for
+/v3/mail/send that validates the payload, records every recipient and
+answers 429 / 503 for `failure_rate` of calls (default 0.2). Requests with a
+recipient at example.invalid get a 400, as SendGrid does for a malformed
+address; `bad_addresses` of them (default 5) are mixed in. Reports calls
+made, retries, throughput and whether every good email arrived exactly once.
+
+The fake can also be served on its own and used via SENDGRID_API_URL:
+
+    uvicorn scripts.bench_email_dispatch:fake_sendgrid --port 8025
+"""
+import asyncio
+import random
+import sys
+import time
+import httpx
+from fastapi import FastAPI, Request, Response
+from app.services.email_dispatch import AlertEmail, EmailDispatcher, MAX_PERSONALIZATIONS
+
+fake_sendgrid = FastAPI()
+fake_sendgrid.state.failure_rate = 0.0
+fake_sendgrid.state.calls = 0
+fake_sendgrid.state.delivered = []
+
+
+@fake_sendgrid.post("/v3/mail/send")
+async def mail_send(request: Request):
+    state = fake_sendgrid.state
+    state.calls += 1
+    if not request.headers.get("authorization", "").startswith("Bearer "):
+        return Response(status_code=401)
+    if random.random() < state.failure_rate:
+        if random.random() < 0.5:
+            return Response(status_code=429, headers={"Retry-After": "0.05"})
+        return Response(status_code=503)
+
+    body = await request.json()
+    personalizations = body["personalizations"]
+    if not 1 <= len(personalizations) <= MAX_PERSONALIZATIONS:
+        return Response(status_code=400, content="too many personalizations")
+    if any(p["to"][0]["email"].endswith("@example.invalid") for p in personalizations):
+        return Response(status_code=400, content="invalid email address")
+    for p in personalizations:
+        state.delivered.append((p["to"][0]["email"], p["substitutions"]["%symbol%"]))
+    await asyncio.sleep(0.02)  # roughly a real round trip
+    return Response(status_code=202)
+
+
+async def run(n: int, failure_rate: float, bad_addresses: int):
+    fake_sendgrid.state.failure_rate = failure_rate
+    transport = httpx.ASGITransport(app=fake_sendgrid)
+    async with httpx.AsyncClient(transport=transport) as client:
+        dispatcher = EmailDispatcher(
+            api_url="http://fake-sendgrid",
+            api_key="test",
+            from_email="alerts@example.com",
+            queue_size=n,
+            batch_size=1000,
+            batch_wait=0.2,
+            workers=2,
+            max_retries=8,
+            backoff_base=0.05,
+        )
+        dispatcher.start(client)
+
+        bad = set(random.sample(range(n), min(bad_addresses, n)))
+        started = time.perf_counter()
+        for i in range(n):
+            domain = "example.invalid" if i in bad else "example.com"
+            dispatcher.submit(AlertEmail(f"user{i}@{domain}", f"SYM{i % 50}", 101.5, 100.0))
+        await dispatcher.stop(drain_timeout=60)
+        elapsed = time.perf_counter() - started
+
+    delivered = fake_sendgrid.state.delivered
+    print(
+        f"emails={n:,} calls={fake_sendgrid.state.calls} elapsed={elapsed:.2f}s "
+        f"({n / elapsed:,.0f} emails/s)"
+    )
+    print(f"metrics={dispatcher.metrics()}")
+    good = n - len(bad)
+    print(
+        f"delivered={len(delivered):,} unique={len(set(delivered)):,} "
+        f"exactly_once={len(delivered) == len(set(delivered)) == good} rejected={dispatcher.failed}"
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    failure_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    bad_addresses = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    asyncio.run(run(n, failure_rate, bad_addresses))
+
+
+if __name__ == "__main__":
+    main()
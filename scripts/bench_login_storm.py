@@ -0,0 +1,86 @@
+"""
+Benchmark: latency of an unrelated endpoint during a login storm.
+
+    python -m scripts.bench_login_storm [logins_per_second] [seconds]
+
+Runs a tiny in-process ASGI app with a /ping endpoint and two login
+endpoints that verify a real bcrypt hash, one inline on the event loop
+(the old behaviour) and one through the bounded hashing pool. /ping is
+probed every 10 ms while logins are issued at the given rate (default 200/s).
+"""
+import asyncio
+import statistics
+import sys
+import time
+import httpx
+from fastapi import FastAPI
+from app.services.auth_service import hash_password, verify_password, verify_password_async
+
+HASHED = hash_password("correct horse battery staple")
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+@app.post("/login-inline")
+async def login_inline():
+    return {"ok": verify_password("correct horse battery staple", HASHED)}
+
+
+@app.post("/login-pooled")
+async def login_pooled():
+    return {"ok": await verify_password_async("correct horse battery staple", HASHED)}
+
+
+async def storm(path: str, rate: float, seconds: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = time.perf_counter() + seconds
+        ping_ms: list[float] = []
+        statuses: dict[int, int] = {}
+
+        async def login():
+            res = await client.post(path)
+            statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+
+        async def logins():
+            tasks = []
+            while time.perf_counter() < stop:
+                tasks.append(asyncio.create_task(login()))
+                await asyncio.sleep(1 / rate)
+            await asyncio.gather(*tasks)
+
+        async def pings():
+            # latency is measured from when the probe was due, so time spent
+            # waiting for a blocked event loop is counted too
+            due = time.perf_counter()
+            while due < stop:
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/ping")
+                ping_ms.append((time.perf_counter() - due) * 1000)
+                due = max(due + 0.01, time.perf_counter())
+
+        await asyncio.gather(logins(), pings())
+
+    ping_ms.sort()
+    p99 = ping_ms[min(len(ping_ms) - 1, int(len(ping_ms) * 0.99))]
+    print(
+        f"{path:14} pings={len(ping_ms):5} p50={statistics.median(ping_ms):8.1f} ms "
+        f"p99={p99:8.1f} ms max={ping_ms[-1]:8.1f} ms logins={statuses}"
+    )
+
+
+def main():
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{rate:.0f} logins/s for {seconds:.0f}s")
+    asyncio.run(storm("/login-inline", rate, seconds))
+    asyncio.run(storm("/login-pooled", rate, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: push-based evaluation from a replayed trade feed.
+
+    python -m scripts.bench_trade_feed [n_alerts] [n_symbols] [n_trades]
+
+Loads an AlertIndex with alerts around random base prices, generates a
+random-walk trade stream in Finnhub's wire format (including symbols
+without alerts, which must not be subscribed) and replays it flat out
+through PriceIngestor. Evaluation only looks crossed alerts up in the index
+(no database), so the numbers show what coalescing saves: how many ticks
+were folded away and how few symbols each flush had to evaluate.
+"""
+import asyncio
+import random
+import sys
+import time
+from scripts.bench_alert_index import make_alerts
+from app.services.alert_index import alert_index
+from app.services.trade_feed import PriceIngestor, ReplayTradeFeed
+
+
+def make_trades(base: dict[str, float], n_trades: int, extra_symbols: int = 100):
+    rng = random.Random(7)
+    prices = dict(base)
+    prices.update({f"NOALERT{i}": rng.uniform(10, 500) for i in range(extra_symbols)})
+    symbols = list(prices)
+    # a few symbols trade far more often than the rest, like a real tape
+    weights = [1 / (i + 1) for i in range(len(symbols))]
+    now_ms = int(time.time() * 1000)
+
+    messages = []
+    for i in range(n_trades // 10):
+        data = []
+        for symbol in rng.choices(symbols, weights, k=10):
+            prices[symbol] = round(prices[symbol] * (1 + rng.gauss(0, 0.002)), 2)
+            data.append({"s": symbol, "p": prices[symbol], "t": now_ms + i, "v": rng.randint(1, 500)})
+        messages.append({"type": "trade", "data": data})
+        if i % 500 == 0:
+            messages.append({"type": "ping"})
+    return messages
+
+
+async def run(n_alerts: int, n_symbols: int, n_trades: int):
+    alerts, base = make_alerts(n_alerts, n_symbols)
+    alert_index.load(alerts)
+    messages = make_trades(base, n_trades)
+
+    evaluations: list[int] = []
+
+    async def evaluate(prices):
+        evaluations.append(len(prices))
+        crossed = [a for symbol, price in prices.items() for a in alert_index.crossed(symbol, price)]
+        for a in crossed:
+            alert_index.remove(a.id)
+        return len(crossed)
+
+    async def active_symbols():
+        return alert_index.symbols()
+
+    feed = ReplayTradeFeed(messages=messages, speed=0)
+    ingestor = PriceIngestor(feed, evaluate, active_symbols, flush_interval=0.05, resync_interval=1.0)
+
+    started = time.perf_counter()
+    await ingestor.run()
+    elapsed = time.perf_counter() - started
+
+    m = ingestor.metrics()
+    print(f"alerts={n_alerts:,} symbols={n_symbols:,} trades={n_trades:,} elapsed={elapsed:.2f}s")
+    print(
+        f"ticks delivered={m['ticks']:,} coalesced={m['coalesced']:,} flushes={m['flushes']} "
+        f"symbols evaluated={m['symbols_evaluated']:,} (avg {m['symbols_evaluated'] / max(1, m['flushes']):.0f}/flush) "
+        f"triggered={m['triggered']:,}"
+    )
+    print(f"subscribed={m['subscribed']:,} (symbols with alerts only); polling would quote {n_symbols:,} per run")
+
+
+def main():
+    n_alerts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    n_trades = int(sys.argv[3]) if len(sys.argv) > 3 else 200_000
+    asyncio.run(run(n_alerts, n_symbols, n_trades))
+
+
+if __name__ == "__main__":
+    main()
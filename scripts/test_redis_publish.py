@@ -1,18 +1,22 @@
 import asyncio
 import redis.asyncio as aioredis
 from app.core.config import settings
+from app.services.alert_events import notify_channel, stream_key
 import json
+import time
 
 async def send_test_alert(user_id: int):
     redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
-    channel = f"user:{user_id}:alerts"
     message = {
         "type": "alert_triggered",
         "symbol": "AAPL",
         "target_price": 180,
         "direction": "above"
     }
-    await redis_client.publish(channel, json.dumps(message))
-    print("Published alert →", channel)
+    entry_id = await redis_client.xadd(
+        stream_key(user_id), {"data": json.dumps(message)}, maxlen=settings.ALERT_STREAM_MAXLEN
+    )
+    await redis_client.publish(notify_channel(user_id), str(time.time()))
+    print("Published alert →", stream_key(user_id), entry_id)
 
 asyncio.run(send_test_alert(1))